@@ -0,0 +1,121 @@
+from decimal import Decimal, ROUND_HALF_UP
+from fractions import Fraction
+
+
+def to_cents(amount):
+    """
+    Converts a money amount to integer cents, rounding half up.
+
+    Args:
+        amount (float | str | Decimal): Amount in currency units
+
+    Returns:
+        int: Amount in cents
+    """
+    return int((Decimal(str(amount)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def allocate(total_cents, weights):
+    """
+    Splits integer cents in proportion to weights with the largest-remainder method.
+
+    Everyone first gets the floor of their exact share; the cents left over go one
+    each to the largest fractional remainders, ties going to the earlier weight. The
+    parts always sum to total_cents and the same input always gives the same split.
+
+    Args:
+        total_cents (int): Amount to split
+        weights (list): Non-negative weights with a positive sum
+
+    Returns:
+        list: Cents per weight, in the same order
+
+    Raises:
+        ValueError: If a weight is negative or all weights are zero
+    """
+    weights = [Fraction(str(weight)) for weight in weights]
+    if any(weight < 0 for weight in weights):
+        raise ValueError("Split weights cannot be negative")
+    weight_sum = sum(weights)
+    if weight_sum == 0:
+        raise ValueError("Split weights must add up to more than zero")
+
+    exact = [total_cents * weight / weight_sum for weight in weights]
+    parts = [share.numerator // share.denominator for share in exact]
+    leftover = total_cents - sum(parts)
+    order = sorted(range(len(exact)), key=lambda i: (parts[i] - exact[i], i))
+    for i in order[:leftover]:
+        parts[i] += 1
+    return parts
+
+
+def item_weights(user_ids, split_type="equal", shares=None):
+    """
+    Weights for one item's participants.
+
+    Args:
+        user_ids (list): Participants of the item
+        split_type (str): "equal", "shares" or "percent"
+        shares (list): Share counts or percentages, parallel to user_ids
+
+    Returns:
+        list: Weights parallel to user_ids
+
+    Raises:
+        ValueError: If the assignment is malformed
+    """
+    if not user_ids:
+        raise ValueError("Each item needs at least one participant")
+    if len(set(user_ids)) != len(user_ids):
+        raise ValueError("An item lists the same participant twice")
+    if split_type == "equal":
+        return [1] * len(user_ids)
+    if split_type not in ("shares", "percent"):
+        raise ValueError(f"Unknown split type: {split_type}")
+    if shares is None or len(shares) != len(user_ids):
+        raise ValueError(f"A {split_type} split needs one value per participant")
+    if split_type == "percent" and sum(Fraction(str(share)) for share in shares) != 100:
+        raise ValueError("Percentages must add up to 100")
+    return shares
+
+
+def allocate_bill(items, tax=0, tip=0):
+    """
+    Works out what every participant owes for a whole bill, in integer cents.
+
+    Each item is split among its participants; tax and tip are then prorated over
+    everyone's item subtotal. Every step uses allocate(), so the per-user amounts add
+    up exactly to the item prices plus tax and tip.
+
+    Args:
+        items (list): Dicts with total_price, user_ids and optionally split_type and shares
+        tax (float): Tax for the whole bill
+        tip (float): Tip for the whole bill
+
+    Returns:
+        dict: user_id -> cents owed, in first-appearance order
+
+    Raises:
+        ValueError: If there are no items, an item is malformed or the bill has nothing
+            to prorate over
+    """
+    if not items:
+        raise ValueError("A bill needs at least one item")
+    subtotals = {}
+    for item in items:
+        user_ids = item["user_ids"]
+        weights = item_weights(user_ids, item.get("split_type", "equal"), item.get("shares"))
+        price_cents = to_cents(item["total_price"])
+        if price_cents < 0:
+            raise ValueError("Item prices cannot be negative")
+        for user_id, cents in zip(user_ids, allocate(price_cents, weights)):
+            subtotals[user_id] = subtotals.get(user_id, 0) + cents
+
+    tax_cents, tip_cents = to_cents(tax), to_cents(tip)
+    if tax_cents < 0 or tip_cents < 0:
+        raise ValueError("Tax and tip cannot be negative")
+    extra_cents = tax_cents + tip_cents
+    if extra_cents:
+        for user_id, cents in zip(subtotals, allocate(extra_cents, list(subtotals.values()))):
+            subtotals[user_id] += cents
+    return subtotals
@@ -0,0 +1,108 @@
+import os
+import wave
+from io import BytesIO
+
+WAV_TYPES = ("audio/wav", "audio/x-wav", "audio/wave", "audio/vnd.wave")
+MP3_TYPES = ("audio/mpeg", "audio/mp3", "audio/mpeg3", "audio/x-mpeg-3")
+
+
+def upload_size(fileobj):
+    position = fileobj.tell()
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(position)
+    return size
+
+
+def iter_audio_chunks(fileobj, filename, content_type, chunk_bytes=8 * 1024 * 1024):
+    """
+    Cuts a recording into independently decodable pieces for concurrent transcription.
+
+    Recordings no larger than chunk_bytes, and formats that cannot be cut without
+    decoding, are yielded whole and without copying. Each piece is a BytesIO holding
+    the only copy of its audio, so closing it once sent frees that memory.
+
+    Args:
+        fileobj: Seekable binary file holding the upload
+        filename (str): Original file name, used for the extension the API relies on
+        content_type (str): MIME type of the upload
+        chunk_bytes (int): Target size of each piece
+
+    Yields:
+        tuple: (filename, file object, content_type) ready to pass as an OpenAI file
+    """
+    filename = filename or "audio"
+    content_type = content_type or "application/octet-stream"
+    stem, ext = os.path.splitext(filename)
+    fileobj.seek(0)
+
+    if upload_size(fileobj) > chunk_bytes:
+        if content_type in WAV_TYPES or ext.lower() == ".wav":
+            pieces = iter_wav_pieces(fileobj, chunk_bytes)
+        elif content_type in MP3_TYPES or ext.lower() == ".mp3":
+            pieces = iter_mp3_pieces(fileobj, chunk_bytes)
+        else:
+            pieces = None
+        if pieces is not None:
+            try:
+                for i, piece in enumerate(pieces):
+                    yield f"{stem}-{i}{ext}", piece, content_type
+                return
+            except wave.Error:
+                # Not PCM WAV after all; send it whole
+                fileobj.seek(0)
+
+    yield filename, fileobj, content_type
+
+
+def iter_wav_pieces(fileobj, chunk_bytes):
+    with wave.open(fileobj, "rb") as reader:
+        params = reader.getparams()
+        frames_per_piece = max(1, chunk_bytes // (params.sampwidth * params.nchannels))
+        while True:
+            frames = reader.readframes(frames_per_piece)
+            if not frames:
+                return
+            output = BytesIO()
+            with wave.open(output, "wb") as writer:
+                writer.setparams(params)
+                writer.writeframes(frames)
+            # Only the piece holds its audio while it waits to be sent
+            del frames
+            output.seek(0)
+            yield output
+
+
+def is_mp3_frame_header(data, i):
+    """
+    True if data[i:i + 4] looks like an MPEG audio frame header.
+    """
+    if i + 4 > len(data) or data[i] != 0xFF or data[i + 1] & 0xE0 != 0xE0:
+        return False
+    version = (data[i + 1] >> 3) & 0x03
+    layer = (data[i + 1] >> 1) & 0x03
+    bitrate = data[i + 2] >> 4
+    sample_rate = (data[i + 2] >> 2) & 0x03
+    return version != 1 and layer != 0 and bitrate not in (0, 15) and sample_rate != 3
+
+
+def iter_mp3_pieces(fileobj, chunk_bytes):
+    """
+    Splits an MP3 stream on frame boundaries so every piece decodes on its own.
+    """
+    carry = b""
+    while True:
+        block = carry + fileobj.read(chunk_bytes - len(carry))
+        if len(block) < chunk_bytes:
+            if block:
+                yield BytesIO(block)
+            return
+        # Cut at the last frame header in the second half of the block
+        half = len(block) // 2
+        i = block.rfind(b"\xff", half, len(block) - 3)
+        while i != -1 and not is_mp3_frame_header(block, i):
+            i = block.rfind(b"\xff", half, i)
+        cut = i if i != -1 else len(block)
+        piece, carry = BytesIO(block[:cut]), block[cut:]
+        del block
+        yield piece
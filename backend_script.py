@@ -1,19 +1,68 @@
-from fastapi import FastAPI, HTTPException, File, UploadFile,Form,Query
+from fastapi import FastAPI, HTTPException, File, UploadFile,Form,Query,Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
-from supabase import create_client, Client
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 import os
+import asyncio
+import copy
+import json
 import datetime
-from fastapi.responses import JSONResponse
-from gpt_4_parser import Bill_parser
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
 from PIL import Image
-import tempfile
 from io import BytesIO
-from voice import Voicee
+from config import supabase_url
+from db import Database
+from clients import ClientRegistry
+from receipt_cache import ReceiptCache
+from jobs import JobQueue
+from cache import TTLCache
+from response_cache import ResponseCache
+from single_flight import SingleFlight
+import metrics
+from balances import ledger_balances
+from settle_up import settle_up, to_net_cents
+from allocation import allocate_bill
 
-app = FastAPI()
+# Initialize Supabase
+load_dotenv("/Users/swagatbhowmik/CS projects/CodeJam2024/bill_parser/.env")
+supabase_key = os.getenv("REACT_APP_SUPABASE_ANON_KEY")
+db = Database(supabase_url, supabase_key)
+services = ClientRegistry()
+receipt_cache = ReceiptCache()
+# Members of each group with their names and emails, keyed by group_id
+roster_cache = TTLCache(maxsize=2048, ttl=300)
+# Cross-group owe/lent per user_id; payments written outside this API age out with the TTL
+user_totals_cache = TTLCache(maxsize=10000, ttl=60)
+# Group of each bill saved by /scan-bill, so split writes can bump its tags without a lookup
+bill_groups = TTLCache(maxsize=50000)
+# ETags and bodies for polled reads; write endpoints bump the group or user they touch
+# Identical reads arriving together share one fetch
+read_flights = SingleFlight(timeout=10.0)
+response_cache = ResponseCache(maxsize=4096, ttl=30, single_flight=read_flights)
+# Identical uploads to a group arriving together, such as a double tap, share one scan and one bill
+scan_flights = SingleFlight(timeout=300.0)
+# Largest page a client can ask the paginated list endpoints for
+MAX_PAGE_SIZE = 1000
+# Seconds a coalesced read of a whole list may take; single-row reads keep read_flights' 10s
+LIST_READ_TIMEOUT = 30.0
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    db.connect()
+    services.start()
+    await run_in_threadpool(services.warm_up)
+    await scan_jobs.start()
+    await delete_jobs.start()
+    yield
+    await delete_jobs.stop()
+    await scan_jobs.stop()
+    services.close()
+    await db.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS - Modified configuration
 origins = [
@@ -32,11 +81,8 @@ app.add_middleware(
     max_age=600,  # Cache preflight requests for 10 minutes
 )
 
-# Initialize Supabase
-load_dotenv("/Users/swagatbhowmik/CS projects/CodeJam2024/bill_parser/.env")
-supabase_url = "https://ltpasfjejihckukshlhs.supabase.co"
-supabase_key = os.getenv("REACT_APP_SUPABASE_ANON_KEY")
-supabase: Client = create_client(supabase_url, supabase_key)
+# Outermost, so latency covers the whole request including CORS handling
+app.add_middleware(metrics.MetricsMiddleware)
 
 # Pydantic models for request validation
 class User(BaseModel):
@@ -58,6 +104,9 @@ class GroupMember(BaseModel):
     group_id: str
     user_id: str
 
+class ScanCacheSetting(BaseModel):
+    enabled: bool
+
 class IndividualExpense(BaseModel):
     group_id: str
     user_id: str
@@ -81,15 +130,49 @@ class AddSplit(BaseModel):
     user_ids: List[str]
     total_price: float
 
+class ItemSplit(BaseModel):
+    total_price: float
+    user_ids: List[str]
+    split_type: str = "equal"  # "equal", "shares" or "percent"
+    shares: Optional[List[float]] = None
+
+class BillSplit(BaseModel):
+    payer_id: str
+    items: List[ItemSplit]
+    tax: float = 0
+    tip: float = 0
+
 @app.get("/")
 async def root():
     return {"message": "Hello World"}
 
+@app.get("/cache-stats")
+async def cache_stats():
+    return {
+        "status": "success",
+        "data": {
+            "translation": services.translation_cache.stats(),
+            "receipt": receipt_cache.stats(),
+            "roster": roster_cache.stats(),
+            "user_totals": user_totals_cache.stats(),
+            "bill_groups": bill_groups.stats(),
+            "responses": response_cache.stats(),
+            "coalesced_reads": read_flights.stats(),
+            "coalesced_scans": scan_flights.stats(),
+            "scan_jobs": scan_jobs.stats(),
+            "delete_jobs": delete_jobs.stats(),
+        },
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/add_friend")
 async def add_friend(friend:AddFriend):
     try:
         # Add bidirectional friendship
-        supabase.table("Friends").insert([
+        await db.table("Friends").insert([
             {"user_id": friend.user_id, "friend_id": friend.friend_id},
             {"user_id": friend.friend_id, "friend_id": friend.user_id},
         ]).execute()
@@ -98,35 +181,55 @@ async def add_friend(friend:AddFriend):
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+async def friend_details(friend_ids):
+    """
+    Friend id and name for each id, in the order given.
+    """
+    friends_data = await db.fetch_in(lambda: db.table("User_info").select("id, name"), "id", friend_ids)
+    names = {friend["id"]: friend["name"] for friend in friends_data}
+    return [
+        {
+            "friend_id": friend_id,
+            "friend_name": names[friend_id],
+        }
+        for friend_id in friend_ids
+        if friend_id in names
+    ]
+
+
+def friend_ids_query(user_id):
+    return db.table("Friends").select("friend_id").eq("user_id", user_id)
+
+
 @app.get("/friends")
-async def get_friends(user_id: str):
+async def get_friends(user_id: str,
+                      limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                      cursor: Optional[str] = None):
     try:
-        # Fetch all friends of the user
-        friends_response = supabase.table("Friends") \
-            .select("friend_id") \
-            .eq("user_id", user_id) \
-            .execute()
-        friend_ids = [friend["friend_id"] for friend in friends_response.data]
+        # Fetch the user's friends, one keyset page of them when a limit is given
+        if limit is None:
+            friends_rows = await db.fetch_all(lambda: friend_ids_query(user_id).order("friend_id"))
+            next_cursor = None
+        else:
+            friends_rows, next_cursor = await db.fetch_page(
+                lambda: friend_ids_query(user_id), "friend_id", limit, cursor
+            )
+        friend_ids = [friend["friend_id"] for friend in friends_rows]
         if not friend_ids:  # Check if group_ids is empty
             return {
                 "status": "success",
                 "data": "No Friends found",
                 }
-            
 
         # If group_ids is not empty, fetch group details
-        friends_data = supabase.table("User_info").select("id, name").in_("id", friend_ids).execute()
-        cleaned_data = [
-            {
-                "friend_id": friend["id"],
-                "friend_name": friend["name"],
-            }
-            for friend in friends_data.data
-        ]
-        return {
+        cleaned_data = await friend_details(friend_ids)
+        response = {
             "status": "success",
             "data": cleaned_data,
         }
+        if limit is not None:
+            response["next_cursor"] = next_cursor
+        return response
     except Exception as e:
         return {
             "status": "error",
@@ -134,11 +237,21 @@ async def get_friends(user_id: str):
         }
 
 
+@app.get("/friends/stream")
+async def stream_friends(user_id: str, page_size: int = Query(500, ge=1, le=MAX_PAGE_SIZE)):
+    async def rows():
+        async for page in db.iter_pages(lambda: friend_ids_query(user_id), "friend_id", page_size):
+            for friend in await friend_details([friend["friend_id"] for friend in page]):
+                yield json.dumps(friend) + "\n"
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+
 @app.get("/find-friend")
 async def find_friend(email_id: str):
     try:
 
-        user = supabase.table("User_info").select("*").eq("email", email_id).execute()
+        user = await db.table("User_info").select("id, name, email, created_at").eq("email", email_id).execute()
 
         
         if not user.data:  
@@ -161,10 +274,14 @@ async def find_friend(email_id: str):
 
 
 @app.get("/user-details")
-async def user_details(user_id: str):
+async def user_details(request: Request, user_id: str):
+    return await response_cache.respond(request, [("user", user_id)], lambda: fetch_user_details(user_id))
+
+
+async def fetch_user_details(user_id):
     try:
 
-        user = supabase.table("User_info").select("*").eq("id", user_id).execute()
+        user = await db.table("User_info").select("id, name, email, created_at").eq("id", user_id).execute()
 
         
         if not user.data:  
@@ -193,12 +310,14 @@ async def user_details(user_id: str):
 async def create_user(user: User):
     print(f"Received user data: {user.dict()}")  # Log the received data
     try:
-        response = supabase.table("User_info").insert({
+        response = await db.table("User_info").insert({
             "id": user.user_id,
             "name": user.name,
             "created_at": user.created,
             "email": user.email
         }).execute()
+        # A poll of /user-details before sign-up may have cached "No User found"
+        response_cache.bump("user", user.user_id)
         
         return response.data[0]
     except Exception as e:
@@ -223,7 +342,7 @@ async def create_group(group: GroupCreate):
         }
         
         # Insert into Groups table
-        group_response = supabase.table("Groups").insert(group_data).execute()
+        group_response = await db.table("Groups").insert(group_data).execute()
         
         if not group_response.data:
             raise HTTPException(status_code=400, detail="Failed to create group")
@@ -239,12 +358,14 @@ async def create_group(group: GroupCreate):
         }
         
         # Insert into Group_Members table
-        member_response = supabase.table("Group_Members").insert(member_data).execute()
+        member_response = await db.table("Group_Members").insert(member_data).execute()
         
         if not member_response.data:
             # Rollback group creation if member addition fails
-            supabase.table("Groups").delete().eq("group_id", group_id).execute()
+            await db.table("Groups").delete().eq("group_id", group_id).execute()
             raise HTTPException(status_code=400, detail="Failed to add creator to group")
+        roster_cache.pop(group_id)
+        response_cache.bump("user", group.created_by)
         
         return {
             "status": "success",
@@ -259,14 +380,55 @@ async def create_group(group: GroupCreate):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def group_details(group_ids):
+    """
+    Name, creator and creation time of each group, in the order given.
+    """
+    groups_data = await db.fetch_in(
+        lambda: db.table("Groups").select("group_id, group_name, created_at,created_by, User_info(name)"),
+        "group_id",
+        group_ids,
+    )
+    groups = {group["group_id"]: group for group in groups_data}
+    return [
+        {
+            "group_id": group["group_id"],
+            "group_name": group["group_name"],
+            "created_by": group["User_info"]["name"],
+            "created_at": group["created_at"]
+        }
+        for group in (groups.get(group_id) for group_id in group_ids)
+        if group is not None
+    ]
+
+
+def group_ids_query(user_id):
+    return db.table("Group_Members").select("group_id").eq("user_id", user_id)
+
+
 @app.get("/groups")
-async def get_group_list(user_id: str):
+async def get_group_list(request: Request,
+                         user_id: str,
+                         limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                         cursor: Optional[str] = None):
+    return await response_cache.respond(
+        request, [("user", user_id)], lambda: fetch_group_list(user_id, limit, cursor), timeout=LIST_READ_TIMEOUT
+    )
+
+
+async def fetch_group_list(user_id, limit=None, cursor=None):
     try:
-        # Step 1: Get the list of group IDs the user belongs to
-        group_response = supabase.table("Group_Members").select("group_id").eq("user_id", user_id).execute()
+        # Step 1: Get the group IDs the user belongs to, one keyset page of them when a limit is given
+        if limit is None:
+            group_rows = await db.fetch_all(lambda: group_ids_query(user_id).order("group_id"))
+            next_cursor = None
+        else:
+            group_rows, next_cursor = await db.fetch_page(
+                lambda: group_ids_query(user_id), "group_id", limit, cursor
+            )
 
         # Step 2: Extract group IDs from the response
-        group_ids = [group["group_id"] for group in group_response.data]
+        group_ids = [group["group_id"] for group in group_rows]
 
         # Step 3: Query the Groups table for the desired columns, filtering by the group IDs
         if not group_ids:  # Check if group_ids is empty
@@ -276,20 +438,14 @@ async def get_group_list(user_id: str):
                 }
 
         # If group_ids is not empty, fetch group details
-        groups_data = supabase.table("Groups").select("group_id, group_name, created_at,created_by, User_info(name)").in_("group_id", group_ids).execute()
-        cleaned_data = [
-            {
-                "group_id": group["group_id"],
-                "group_name": group["group_name"],
-                "created_by": group["User_info"]["name"],
-                "created_at": group["created_at"]
-            }
-            for group in groups_data.data
-        ]
-        return {
+        cleaned_data = await group_details(group_ids)
+        response = {
             "status": "success",
             "data": cleaned_data,
         }
+        if limit is not None:
+            response["next_cursor"] = next_cursor
+        return response
 
 
     except Exception as e:
@@ -299,32 +455,74 @@ async def get_group_list(user_id: str):
         }
 
 
+@app.get("/groups/stream")
+async def stream_groups(user_id: str, page_size: int = Query(500, ge=1, le=MAX_PAGE_SIZE)):
+    async def rows():
+        async for page in db.iter_pages(lambda: group_ids_query(user_id), "group_id", page_size):
+            for group in await group_details([group["group_id"] for group in page]):
+                yield json.dumps(group) + "\n"
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+
+
+
 
+async def get_group_roster(group_id):
+    """
+    Members of a group as {user_id, joined_at, User_info: {name, email}}, served from
+    roster_cache. Endpoints that change membership pop the group's entry.
+    """
+    roster = roster_cache.get(group_id)
+    if roster is None:
+        members_response = (
+            await db.table("Group_Members")
+            .select("user_id, joined_at, User_info(name, email)")
+            .eq("group_id", group_id)
+            .execute()
+        )
+        roster = members_response.data
+        roster_cache.set(group_id, roster)
+    return roster
 
 
 @app.get("/groups/{group_id}")
-async def get_group(group_id: str):
+async def get_group(request: Request,
+                    group_id: str,
+                    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                    cursor: Optional[str] = None):
+    return await response_cache.respond(
+        request, [("group", group_id)], lambda: fetch_group(group_id, limit, cursor), timeout=LIST_READ_TIMEOUT
+    )
+
+
+async def fetch_group(group_id, limit=None, cursor=None):
     try:
         # Fetch group details
-        group_response = supabase.table("Groups").select("*").eq("group_id", group_id).execute()
+        group_response = await db.table("Groups") \
+            .select("group_id, group_name, description, created_by, created_at") \
+            .eq("group_id", group_id) \
+            .execute()
         
         if not group_response.data:
             raise HTTPException(status_code=404, detail="Group not found")
             
-        # Fetch group members
-        members_response = (
-            supabase.table("Group_Members")
-            .select("user_id, joined_at, User_info(name, email)")
-            .eq("group_id", group_id)
-            .execute()
-        )
+        # Fetch group members, paged by user_id over the cached roster when a limit is given
+        members = await get_group_roster(group_id)
+        data = {
+            "group": group_response.data[0],
+            "members": members
+        }
+        if limit is not None:
+            members = sorted(members, key=lambda member: str(member["user_id"]))
+            if cursor is not None:
+                members = [member for member in members if str(member["user_id"]) > cursor]
+            data["members"] = members[:limit]
+            data["next_cursor"] = str(members[limit - 1]["user_id"]) if len(members) > limit else None
         
         return {
             "status": "success",
-            "data": {
-                "group": group_response.data[0],
-                "members": members_response.data
-            }
+            "data": data
         }
         
     except HTTPException as he:
@@ -336,7 +534,7 @@ async def get_group(group_id: str):
 async def add_group_member(group_id: str, member: GroupMember):
     try:
         # Check if group exists
-        group_exists = supabase.table("Groups").select("group_id").eq("group_id", group_id).execute()
+        group_exists = await db.table("Groups").select("group_id").eq("group_id", group_id).execute()
         if not group_exists.data:
             return {
                 "status": "error",
@@ -344,7 +542,7 @@ async def add_group_member(group_id: str, member: GroupMember):
             }
 
         # Check if user exists
-        user_exists = supabase.table("User_info").select("id").eq("id", member.user_id).execute()
+        user_exists = await db.table("User_info").select("id").eq("id", member.user_id).execute()
         if not user_exists.data:
             return {
                 "status": "error",
@@ -353,7 +551,7 @@ async def add_group_member(group_id: str, member: GroupMember):
 
         # Check if user is already a member
         existing_member = (
-            supabase.table("Group_Members")
+            await db.table("Group_Members")
             .select("*")
             .eq("group_id", group_id)
             .eq("user_id", member.user_id)
@@ -373,7 +571,10 @@ async def add_group_member(group_id: str, member: GroupMember):
             "joined_at": datetime.datetime.utcnow().isoformat()
         }
 
-        response = supabase.table("Group_Members").insert(member_data).execute()
+        response = await db.table("Group_Members").insert(member_data).execute()
+        roster_cache.pop(group_id)
+        response_cache.bump("group", group_id)
+        response_cache.bump("user", member.user_id)
 
         return {
             "status": "success",
@@ -389,46 +590,128 @@ async def add_group_member(group_id: str, member: GroupMember):
 
 
 
+@app.put("/groups/{group_id}/scan-cache")
+async def configure_scan_cache(group_id: str, setting: ScanCacheSetting):
+    receipt_cache.configure_group(group_id, setting.enabled)
+    return {
+        "status": "success",
+        "data": {"group_id": group_id, "enabled": setting.enabled},
+    }
+
  
-@app.post("/scan-bill")
-async def predict(group_id: str = Form(...), 
-                 user_id: str = Form(...),
-                 file: UploadFile = File(...)):
-    try:
-        image_data = await file.read()
-        
-        parser = Bill_parser()
-        bill_json = parser.parse_byte(image_data)
+async def process_bill_scan(group_id, user_id, image_data):
+    """
+    Parse, translate and persist an uploaded bill. Shared by /scan-bill and its job workers.
+    """
+    # Identical upload to this group moments ago: return the bill that was already saved
+    digest = receipt_cache.digest(image_data)
+    duplicate = receipt_cache.recent_bill(group_id, digest)
+    if duplicate is not None:
+        return {"data": duplicate, "cached": True}
+    if not receipt_cache.is_enabled(group_id):
+        return await scan_and_save_bill(group_id, user_id, image_data, digest)
+
+    # Still being scanned for an earlier request: wait for its bill instead of saving a second one
+    key = (group_id, digest)
+    joined = key in scan_flights.in_flight
+    result = await scan_flights.run(key, lambda: scan_and_save_bill(group_id, user_id, image_data, digest))
+    return {"data": copy.deepcopy(result["data"]), "cached": result["cached"] or joined}
+
+
+async def scan_and_save_bill(group_id, user_id, image_data, digest):
+    """
+    Parse, translate and persist a bill not saved before.
+    """
+    # Same photo (or a re-encoded copy) parsed before: skip the vision model
+    translated, phash = await run_in_threadpool(receipt_cache.lookup, group_id, image_data, digest)
+    cached = translated is not None
+    if not cached:
+        parser = services.bill_parser
+        bill_json = await run_in_threadpool(parser.parse_byte, image_data)
         json_obj = parser.jsonify_parse(bill_json)
-        total_price = sum(item['total_price'] for item in json_obj['items'])
-        translated = parser.translate(json_obj)
+        translated = await run_in_threadpool(parser.translate, json_obj)
+        receipt_cache.store(group_id, digest, phash, translated)
+    total_price = sum(item['total_price'] for item in translated['items'])
 
-        # Insert bill record
-        response = supabase.table("Bills").insert({
+    # Bill and items are written by one database function, in one transaction
+    response = await db.rpc("create_bill_with_items", {
+        "p_bill": {
             "group_id": group_id,
             "uploaded_by": user_id,
             "total_amount": total_price,
-        }).execute()
-
-        bill_id = response.data[0]["bill_id"]
-        translated['bill_id'] = bill_id  # Add bill_id to the main object
-
-        # Process each item and add IDs
-        for item in translated['items']:
-            item_response = supabase.table("Bill_Items").insert({
-                "bill_id": bill_id,
+        },
+        "p_items": [
+            {
                 "item_name": item["item_name"],
                 "quantity": item["quantity"],
                 "total_price": item["total_price"],
-            }).execute()
-            
-            # Add bill_id and item_id to each item
-            item['bill_id'] = bill_id
-            item['item_id'] = item_response.data[0]["item_id"]
+            }
+            for item in translated['items']
+        ],
+    }).execute()
+
+    bill_id = response.data["bill_id"]
+    translated['bill_id'] = bill_id  # Add bill_id to the main object
+
+    # Item ids come back in the order the items were sent
+    for item, item_id in zip(translated['items'], response.data["item_ids"]):
+        item['bill_id'] = bill_id
+        item['item_id'] = item_id
+
+    bill_groups.set(str(bill_id), group_id)
+    receipt_cache.remember_bill(group_id, digest, translated)
+    return {"data": translated, "cached": cached}
+
+scan_jobs = JobQueue(
+    process_bill_scan,
+    workers=int(os.getenv("SCAN_WORKERS", "4")),
+    callback_hosts=os.getenv("SCAN_CALLBACK_HOSTS", "").split(","),
+)
 
+@app.post("/scan-bill")
+async def predict(group_id: str = Form(...), 
+                 user_id: str = Form(...),
+                 file: UploadFile = File(...),
+                 background: bool = Form(False),
+                 callback_url: Optional[str] = Form(None)):
+    try:
+        image_data = await file.read()
+
+        if background:
+            # Hand the upload to a worker and answer right away with a job id
+            try:
+                job = scan_jobs.submit(
+                    {"group_id": group_id, "user_id": user_id, "image_data": image_data},
+                    callback_url=callback_url,
+                )
+            except ValueError as e:
+                return JSONResponse(
+                    content={
+                        "status": "error",
+                        "message": str(e)
+                    },
+                    status_code=400
+                )
+            except asyncio.QueueFull:
+                return JSONResponse(
+                    content={
+                        "status": "error",
+                        "message": "Scan queue is full, try again shortly"
+                    },
+                    status_code=503
+                )
+            return JSONResponse(
+                content={
+                    "status": "accepted",
+                    "data": {"job_id": job["job_id"], "status": job["status"]}
+                },
+                status_code=202
+            )
+
+        result = await process_bill_scan(group_id, user_id, image_data)
         return {
             "status": "success",
-            "data": translated
+            **result,
         }
         
     except Exception as e:
@@ -438,6 +721,23 @@ async def predict(group_id: str = Form(...),
         }
 
 
+@app.get("/scan-bill/jobs/{job_id}")
+async def get_scan_job(job_id: str):
+    job = scan_jobs.get(job_id)
+    if job is None:
+        return JSONResponse(
+            content={
+                "status": "error",
+                "message": "Job not found"
+            },
+            status_code=404
+        )
+    return {
+        "status": "success",
+        "data": job,
+    }
+
+
 
 
 @app.post("/audio-split")
@@ -449,40 +749,34 @@ async def transcribe_audio(
     try:
         # Fetch group members
         logger.info(f"Fetching members for group_id: {group_id}")
-        members_response = supabase.table("Group_Members").select("user_id").eq("group_id", group_id).execute()
-        if not members_response.data:
+        members = await get_group_roster(group_id)
+        if not members:
             return {"status": "error", "message": "No members found in the group"}
         
-        user_ids = [member["user_id"] for member in members_response.data]
-        
-        logger.info(f"Querying names for user_ids: {user_ids}")
-        users_response = supabase.table("User_info").select("id, name").in_("id", user_ids).execute()
-        if not users_response.data:
+        users = [
+            {"id": member["user_id"], "name": member["User_info"]["name"]}
+            for member in members
+            if member.get("User_info")
+        ]
+        if not users:
             return {"status": "error", "message": "No user information found", "data": []}
         
         # Create a mapping of names to user_ids
-        name_to_user_id = {user["name"]: user["id"] for user in users_response.data}
+        name_to_user_id = {user["name"]: user["id"] for user in users}
 
-        names = [user["name"] for user in users_response.data]
+        names = [user["name"] for user in users]
         logger.info(f"Names fetched: {names}")
 
-        # Save audio to a temporary file
-        audio_bytes = await file.read()
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_audio:
-            temp_audio.write(audio_bytes)
-            temp_audio_path = temp_audio.name
-            logger.info(f"Audio file saved temporarily at {temp_audio_path}")
-
-        try:
-            # Open the temporary file in binary mode and pass it to the API
-            with open(temp_audio_path, "rb") as audio_file:
-                voice_split = Voicee()
-                found_names = voice_split.transcribe(audio_file, names)
-                logger.info(f"Transcription complete: {found_names}")
-        finally:
-            # Ensure the temporary file is deleted
-            os.remove(temp_audio_path)
-            logger.info(f"Temporary file {temp_audio_path} deleted.")
+        # Stream the spooled upload straight to the transcription client, keeping its real type
+        voice_split = services.voice
+        found_names = await run_in_threadpool(
+            voice_split.transcribe,
+            file.file,
+            names,
+            filename=file.filename,
+            content_type=file.content_type,
+        )
+        logger.info(f"Transcription complete: {found_names}")
 
         # Convert found names to user_ids
         found_user_ids = [name_to_user_id[name] for name in found_names if name in name_to_user_id]
@@ -499,70 +793,49 @@ async def transcribe_audio(
 
 
 
+@app.get("/audio-split/stats")
+async def audio_split_stats():
+    return {
+        "status": "success",
+        "data": services.voice.stats(),
+    }
+
+
 @app.get("/group-expense")
 async def get_group_expense(
+    request: Request,
     group_id: str = Query(..., description="Group ID"),
     user_id: str = Query(..., description="User ID"),
 ):
-    individual_expense = IndividualExpense(group_id=group_id, user_id=user_id)
-    try:
-        # Step 1: Get the list of bill_ids the user belongs to
-        bills_response = supabase.table("Bills").select("bill_id").eq("group_id", individual_expense.group_id).execute()
-
-        # Step 2: Extract bill_ids from the response
-        bill_ids = [bill["bill_id"] for bill in bills_response.data]  # Corrected variable name
+    return await response_cache.respond(
+        request, [("group", group_id)], lambda: fetch_group_expense(group_id, user_id)
+    )
 
-        # Step 3: Check if there are no bills for the group
-        if not bill_ids:
-            return {
-                "status": "success",
-                "data": "settled up bo bill",
-            }
 
-        # Fetch the splits for the user for the corresponding bill_ids
-        splits_data = supabase.table("Splits").select("amount_due", "amount_paid") \
-            .in_("bill_id", bill_ids) \
+async def fetch_group_expense(group_id, user_id):
+    individual_expense = IndividualExpense(group_id=group_id, user_id=user_id)
+    try:
+        # Running totals kept up to date by triggers on Splits and Payment_Transactions
+        balance_response = await db.table("Group_Balances") \
+            .select("amount_due, amount_paid, payments_made, payments_received, split_count") \
+            .eq("group_id", individual_expense.group_id) \
             .eq("user_id", individual_expense.user_id) \
             .execute()
-        
-        logger.info(f"splits_data: {splits_data.data}")
 
-        if not splits_data.data:
+        if not balance_response.data or not balance_response.data[0]["split_count"]:
+            # Only this path reads Bills, to keep the message clients saw for groups without bills
+            bills_response = await db.table("Bills").select("bill_id").eq("group_id", individual_expense.group_id) \
+                .limit(1).execute()
             return {
                 "status": "success",
-                "data": "settled up no splits",
+                "data": "settled up no splits" if bills_response.data else "settled up bo bill",
             }
 
-        # Query to calculate the total amount paid by the user
-        paid_query = (
-            supabase.table("Payment_Transactions")
-            .select("amount")
-            .eq("payer_id", individual_expense.user_id)
-            .eq("group_id", individual_expense.group_id)
-            .execute()
-        )
-
-        # Query to calculate the total amount received by the user
-        received_query = (
-            supabase.table("Payment_Transactions")
-            .select("amount")
-            .eq("payee_id", individual_expense.user_id)
-            .eq("group_id", individual_expense.group_id)
-            .execute()
-        )
-
-        # Extracting and summing up amounts
-        def calculate_total_amount(query_result):
-            if query_result.data:
-                return sum(transaction["amount"] for transaction in query_result.data)
-            return 0
-
-        total_paid = calculate_total_amount(paid_query)
-        total_received = calculate_total_amount(received_query)
+        balance = balance_response.data[0]
 
         # Calculate net amount
-        total_amount_due = round(sum(item["amount_due"] for item in splits_data.data) - total_paid, 2)
-        total_amount_paid = round(sum(item["amount_paid"] for item in splits_data.data) - total_received, 2)
+        total_amount_due = round(float(balance["amount_due"]) - float(balance["payments_made"]), 2)
+        total_amount_paid = round(float(balance["amount_paid"]) - float(balance["payments_received"]), 2)
         logger.info(f"amount_due_total: {total_amount_due}")
         logger.info(f"amount_paid_total: {total_amount_paid}")
 
@@ -578,84 +851,127 @@ async def get_group_expense(
         }
 
 
-@app.get("/user-total-expense")
-async def get_total_expense(user_id: str):
+async def fetch_group_balances(group_id, settle_without_splits=True):
+    """
+    Owe/lent for every member of a group from its ledger rows, one per user.
+    See balances.ledger_balances for settle_without_splits.
+
+    Returns:
+        list: {user_id, name, owe, lent} per member, then any former members with balances
+    """
+    ledger, members = await asyncio.gather(
+        db.fetch_all(
+            lambda: db.table("Group_Balances")
+            .select("user_id, amount_due, amount_paid, payments_made, payments_received, split_count")
+            .eq("group_id", group_id)
+            .order("user_id")
+        ),
+        get_group_roster(group_id),
+    )
+
+    balances = ledger_balances(ledger, settle_without_splits)
+    data = []
+    for member in members:
+        balance = balances.pop(str(member["user_id"]), {"owe": 0, "lent": 0})
+        data.append({
+            "user_id": member["user_id"],
+            "name": (member.get("User_info") or {}).get("name"),
+            **balance,
+        })
+    # Users who left the group but still have splits or payments in it
+    for user_id, balance in balances.items():
+        data.append({"user_id": user_id, "name": None, **balance})
+    return data
+
+
+@app.get("/groups/{group_id}/balances")
+async def get_group_balances(group_id: str):
     try:
-        # Step 1: Get all groups the user is part of
-        groups_response = supabase.table("Group_Members").select("group_id").eq("user_id", user_id).execute()
-        
-        if not groups_response.data:
-            return {
-                "status": "success",
-                "data": {"owe": 0, "lent": 0}
-            }
+        # One read of the group's ledger covers every member at the same time
+        data = await fetch_group_balances(group_id)
 
-        group_ids = [group["group_id"] for group in groups_response.data]
+        return {
+            "status": "success",
+            "data": data,
+        }
 
-        # Step 2: Get all bills from these groups
-        bills_response = supabase.table("Bills").select("bill_id").in_("group_id", group_ids).execute()
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": str(e),
+        }
 
-        if not bills_response.data:
-            return {
-                "status": "success",
-                "data": {"owe": 0, "lent": 0}
-            }
 
-        bill_ids = [bill["bill_id"] for bill in bills_response.data]
+@app.get("/groups/{group_id}/settle-up")
+async def get_settle_up_plan(group_id: str):
+    try:
+        # Every payment counts toward the plan, even from users without splits
+        balances = await fetch_group_balances(group_id, settle_without_splits=False)
+        net_cents = to_net_cents({str(member["user_id"]): member for member in balances})
+        transfers = settle_up(net_cents)
 
-        # Step 3: Fetch all splits for the user across these bills
-        splits_data = supabase.table("Splits").select("amount_due", "amount_paid") \
-            .in_("bill_id", bill_ids) \
-            .eq("user_id", user_id) \
-            .execute()
+        return {
+            "status": "success",
+            "data": [
+                {
+                    "payer_id": payer_id,
+                    "payee_id": payee_id,
+                    "amount": cents / 100,
+                }
+                for payer_id, payee_id, cents in transfers
+            ],
+        }
 
-        if not splits_data.data:
-            return {
-                "status": "success",
-                "data": {"owe": 0, "lent": 0}
-            }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": str(e),
+        }
 
-        # Step 4: Get all payments made by the user across all groups
-        paid_query = (
-            supabase.table("Payment_Transactions")
-            .select("amount")
-            .eq("payer_id", user_id)
-            .in_("group_id", group_ids)
-            .execute()
-        )
 
-        # Step 5: Get all payments received by the user across all groups
-        received_query = (
-            supabase.table("Payment_Transactions")
-            .select("amount")
-            .eq("payee_id", user_id)
-            .in_("group_id", group_ids)
-            .execute()
+@app.get("/user-total-expense")
+async def get_total_expense(user_id: str):
+    cached = user_totals_cache.get(user_id)
+    if cached is not None:
+        return {
+            "status": "success",
+            "data": cached
+        }
+    try:
+        # The user's groups and per-group ledger rows; both scale with groups, not bill history
+        # Paged so users in more groups than the server's row limit are not cut off
+        group_rows, balance_rows = await asyncio.gather(
+            db.fetch_all(
+                lambda: db.table("Group_Members").select("group_id").eq("user_id", user_id).order("group_id")
+            ),
+            db.fetch_all(
+                lambda: db.table("Group_Balances")
+                .select("group_id, amount_due, amount_paid, payments_made, payments_received, split_count")
+                .eq("user_id", user_id)
+                .order("group_id")
+            ),
         )
 
-        # Calculate totals
-        def calculate_total_amount(query_result):
-            if query_result.data:
-                return sum(transaction["amount"] for transaction in query_result.data)
-            return 0
-
-        total_paid = calculate_total_amount(paid_query)
-        total_received = calculate_total_amount(received_query)
+        group_ids = {str(group["group_id"]) for group in group_rows}
+        balances = [row for row in balance_rows if row["group_id"] in group_ids]
 
-        # Calculate net amounts
-        total_amount_due = round(sum(item["amount_due"] for item in splits_data.data) - total_paid, 2)
-        total_amount_paid = round(sum(item["amount_paid"] for item in splits_data.data) - total_received, 2)
+        if not balances or not sum(row["split_count"] for row in balances):
+            totals = {"owe": 0, "lent": 0}
+        else:
+            # Calculate net amounts
+            totals = {
+                "owe": round(sum(float(row["amount_due"]) - float(row["payments_made"]) for row in balances), 2),
+                "lent": round(sum(float(row["amount_paid"]) - float(row["payments_received"]) for row in balances), 2),
+            }
 
+        user_totals_cache.set(user_id, totals)
         return {
             "status": "success",
-            "data": {
-                "owe": total_amount_due,
-                "lent": total_amount_paid
-            }
+            "data": totals
         }
 
     except Exception as e:
-        print(f"Error in get-total-expense: {str(e)}")  # For debugging
+        logger.error(f"Error in get-total-expense: {str(e)}")
         return {
             "status": "error",
             "message": str(e)
@@ -664,6 +980,20 @@ async def get_total_expense(user_id: str):
 
 
 
+def forget_split_totals(splits, bill_id):
+    """
+    Drops cached totals and response tags that new splits on a bill made stale.
+    """
+    for split_entry in splits:
+        user_totals_cache.pop(split_entry["user_id"])
+    group_id = bill_groups.get(str(bill_id))
+    if group_id is None:
+        # Bill not scanned by this process: retire every tag rather than serve stale balances
+        response_cache.invalidate_all()
+    else:
+        response_cache.bump("group", group_id)
+
+
 @app.post("/add-split")
 async def split(adsplit: AddSplit):
     try:
@@ -719,12 +1049,10 @@ async def split(adsplit: AddSplit):
             splits_to_insert.append(payer_entry)
             
         
-        # Insert each split one by one
-        logger.info("Attempting to insert splits...")
-        
-        for split_entry in splits_to_insert:
-            response = supabase.table("Splits").insert(split_entry).execute()
-            logger.info(f"Insert response for {split_entry['user_id']}: {response}")
+        # One bulk insert is a single statement, so the whole split lands or none of it does
+        logger.info(f"Inserting {len(splits_to_insert)} splits for bill_id: {adsplit.bill_id}")
+        await db.table("Splits").insert(splits_to_insert).execute()
+        forget_split_totals(splits_to_insert, adsplit.bill_id)
         
         return {
             "status": "success",
@@ -740,15 +1068,101 @@ async def split(adsplit: AddSplit):
         }
 
 
+@app.post("/bills/{bill_id}/split")
+async def split_bill(bill_id: str, bill_split: BillSplit):
+    """
+    Splits a whole bill in one request: every item's assignment, plus tax and tip
+    prorated over each participant's subtotal, allocated in exact cents.
+    """
+    try:
+        owed = allocate_bill(
+            [item.model_dump() for item in bill_split.items],
+            tax=bill_split.tax,
+            tip=bill_split.tip,
+        )
+
+        # Same row shape as /add-split: the payer is credited with everyone else's share
+        payer_id = bill_split.payer_id
+        splits_to_insert = [
+            {"bill_id": bill_id, "user_id": user_id, "amount_due": cents / 100, "amount_paid": 0}
+            for user_id, cents in owed.items()
+            if user_id != payer_id
+        ]
+        paid_cents = sum(cents for user_id, cents in owed.items() if user_id != payer_id)
+        splits_to_insert.append(
+            {"bill_id": bill_id, "user_id": payer_id, "amount_due": 0, "amount_paid": paid_cents / 100}
+        )
+
+        logger.info(f"Inserting {len(splits_to_insert)} splits for bill_id: {bill_id}")
+        await db.table("Splits").insert(splits_to_insert).execute()
+        forget_split_totals(splits_to_insert, bill_id)
+
+        return {
+            "status": "success",
+            "message": "Bill split successfully",
+            "data": {user_id: cents / 100 for user_id, cents in owed.items()}
+        }
+
+    except ValueError as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+    except Exception as e:
+        logger.error(f"Error in bill split: {str(e)}")
+        logger.error(traceback.format_exc())
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+
+
+
 
+# Groups with more bills than this are deleted in the background, this many bills per batch
+DELETE_BATCH_BILLS = int(os.getenv("DELETE_BATCH_BILLS", "500"))
+
+def forget_deleted_group(group_id):
+    receipt_cache.forget_group(group_id)
+    # Every member's cross-group totals changed
+    user_totals_cache.clear()
+    roster_cache.pop(group_id)
+    response_cache.invalidate_all()
+
+
+async def process_group_delete(group_id, progress):
+    """
+    Deletes a large group a batch of bills at a time, reporting progress after each batch.
+    """
+    bills_deleted = 0
+    while True:
+        response = await db.rpc("delete_group_batch", {
+            "p_group_id": group_id,
+            "p_batch_size": DELETE_BATCH_BILLS,
+        }).execute()
+        batch = response.data
+        bills_deleted += batch["bills_deleted"]
+        progress(bills_deleted=bills_deleted, bills_remaining=batch["bills_remaining"])
+        if batch["done"]:
+            break
+
+    forget_deleted_group(group_id)
+    return {"group_id": group_id, "bills_deleted": bills_deleted}
+
+delete_jobs = JobQueue(process_group_delete, workers=1, report_progress=True)
 
 @app.delete("/delete-group")
 async def delete_group(group_id: str, user_id: str):
     try:
-        # First verify if the group exists and check authorization
-        group = supabase.table("Groups").select("*").eq("group_id", group_id).execute()
-        
-        if not group.data:
+        # Authorization and the whole cascade run in one database transaction
+        response = await db.rpc("delete_group_cascade", {
+            "p_group_id": group_id,
+            "p_user_id": user_id,
+            "p_max_bills": DELETE_BATCH_BILLS,
+        }).execute()
+        result = response.data
+
+        if result["status"] == "not_found":
             return JSONResponse(
                 content={
                     "status": "error",
@@ -756,9 +1170,8 @@ async def delete_group(group_id: str, user_id: str):
                 },
                 status_code=404
             )
-        
-        # Check if the user is the creator of the group
-        if group.data[0]["created_by"] != user_id:
+
+        if result["status"] == "forbidden":
             return JSONResponse(
                 content={
                     "status": "error",
@@ -767,79 +1180,27 @@ async def delete_group(group_id: str, user_id: str):
                 status_code=403
             )
 
-        # Rest of your deletion logic remains the same...
-        bills_response = supabase.table("Bills").select("bill_id").eq("group_id", group_id).execute()
-        print(f"Found bills: {bills_response.data}")  # Debug log
-        
-        bill_ids = [bill["bill_id"] for bill in bills_response.data]
-
-        if bill_ids:
-            # Step 2: Delete all bill items
-            try:
-                bill_items_deletion = supabase.table("Bill_Items") \
-                    .delete() \
-                    .in_("bill_id", bill_ids) \
-                    .execute()
-                print(f"Deleted bill items: {bill_items_deletion.data}")  # Debug log
-            except Exception as e:
-                print(f"Error deleting bill items: {str(e)}")
-                raise e
-
-            # Step 3: Delete splits
+        if result["status"] == "too_large":
             try:
-                splits_deletion = supabase.table("Splits") \
-                    .delete() \
-                    .in_("bill_id", bill_ids) \
-                    .execute()
-                print(f"Deleted splits: {splits_deletion.data}")  # Debug log
-            except Exception as e:
-                print(f"Error deleting splits: {str(e)}")
-                raise e
-
-            # Step 4: Delete payment transactions
-            try:
-                payments_deletion = supabase.table("Payment_Transactions") \
-                    .delete() \
-                    .eq("group_id", group_id) \
-                    .execute()
-                print(f"Deleted payments: {payments_deletion.data}")  # Debug log
-            except Exception as e:
-                print(f"Error deleting payments: {str(e)}")
-                raise e
-
-            # Step 5: Delete bills
-            try:
-                bills_deletion = supabase.table("Bills") \
-                    .delete() \
-                    .eq("group_id", group_id) \
-                    .execute()
-                print(f"Deleted bills: {bills_deletion.data}")  # Debug log
-            except Exception as e:
-                print(f"Error deleting bills: {str(e)}")
-                raise e
-
-        # Step 6: Delete group members
-        try:
-            group_members_deletion = supabase.table("Group_Members") \
-                .delete() \
-                .eq("group_id", group_id) \
-                .execute()
-            print(f"Deleted group members: {group_members_deletion.data}")  # Debug log
-        except Exception as e:
-            print(f"Error deleting group members: {str(e)}")
-            raise e
-
-        # Step 7: Delete group
-        try:
-            group_deletion = supabase.table("Groups") \
-                .delete() \
-                .eq("group_id", group_id) \
-                .execute()
-            print(f"Deleted group: {group_deletion.data}")  # Debug log
-        except Exception as e:
-            print(f"Error deleting group: {str(e)}")
-            raise e
+                job = delete_jobs.submit({"group_id": group_id})
+            except asyncio.QueueFull:
+                return JSONResponse(
+                    content={
+                        "status": "error",
+                        "message": "Delete queue is full, try again shortly"
+                    },
+                    status_code=503
+                )
+            return JSONResponse(
+                content={
+                    "status": "accepted",
+                    "message": f"Group has {result['bills']} bills and is being deleted in the background",
+                    "data": {"job_id": job["job_id"], "status": job["status"]}
+                },
+                status_code=202
+            )
 
+        forget_deleted_group(group_id)
         return JSONResponse(
             content={
                 "status": "success",
@@ -850,7 +1211,7 @@ async def delete_group(group_id: str, user_id: str):
 
     except Exception as e:
         error_message = str(e)
-        print(f"Error in delete-group: {error_message}")  # Debug log
+        logger.error(f"Error in delete-group: {error_message}")
         return JSONResponse(
             content={
                 "status": "error",
@@ -859,12 +1220,28 @@ async def delete_group(group_id: str, user_id: str):
             status_code=500
         )
 
+@app.get("/delete-group/jobs/{job_id}")
+async def get_delete_job(job_id: str):
+    job = delete_jobs.get(job_id)
+    if job is None:
+        return JSONResponse(
+            content={
+                "status": "error",
+                "message": "Job not found"
+            },
+            status_code=404
+        )
+    return {
+        "status": "success",
+        "data": job,
+    }
+
 @app.delete("/delete-bill")
 async def delete_bill(bill_id: str):
     try:
-        # First verify if the bill exists
-        bill = supabase.table("Bills").select("*").eq("bill_id", bill_id).execute()
-        if not bill.data:
+        # Items, splits and the bill go in one database transaction
+        response = await db.rpc("delete_bill_cascade", {"p_bill_id": bill_id}).execute()
+        if response.data["status"] == "not_found":
             return JSONResponse(
                 content={
                     "status": "error",
@@ -873,39 +1250,10 @@ async def delete_bill(bill_id: str):
                 status_code=404
             )
 
-        # Step 1: Delete all bill items
-        try:
-            bill_items_deletion = supabase.table("Bill_Items") \
-                .delete() \
-                .eq("bill_id", bill_id) \
-                .execute()
-            print(f"Deleted bill items: {bill_items_deletion.data}")  # Debug log
-        except Exception as e:
-            print(f"Error deleting bill items: {str(e)}")
-            raise e
-
-        # Step 2: Delete splits
-        try:
-            splits_deletion = supabase.table("Splits") \
-                .delete() \
-                .eq("bill_id", bill_id) \
-                .execute()
-            print(f"Deleted splits: {splits_deletion.data}")  # Debug log
-        except Exception as e:
-            print(f"Error deleting splits: {str(e)}")
-            raise e
-
-        # Step 3: Delete the bill itself
-        try:
-            bill_deletion = supabase.table("Bills") \
-                .delete() \
-                .eq("bill_id", bill_id) \
-                .execute()
-            print(f"Deleted bill: {bill_deletion.data}")  # Debug log
-        except Exception as e:
-            print(f"Error deleting bill: {str(e)}")
-            raise e
-
+        receipt_cache.forget_bill(bill_id)
+        bill_groups.pop(str(bill_id))
+        user_totals_cache.clear()
+        response_cache.invalidate_all()
         return JSONResponse(
             content={
                 "status": "success",
@@ -916,7 +1264,7 @@ async def delete_bill(bill_id: str):
 
     except Exception as e:
         error_message = str(e)
-        print(f"Error in delete-bill: {error_message}")  # Debug log
+        logger.error(f"Error in delete-bill: {error_message}")
         return JSONResponse(
             content={
                 "status": "error",
@@ -0,0 +1,27 @@
+def ledger_balances(rows, settle_without_splits=True):
+    """
+    Computes owe/lent for every user of a group from its Group_Balances ledger rows.
+
+    Uses the same arithmetic as /group-expense: owe is the user's split dues minus
+    payments they made, lent is what they paid on splits minus payments they received.
+    Like /group-expense, users without any split are reported as settled at zero
+    unless settle_without_splits is False.
+
+    Args:
+        rows (list): Group_Balances rows with user_id, amount_due, amount_paid,
+            payments_made, payments_received and split_count
+        settle_without_splits (bool): Zero out users who only appear in payments
+
+    Returns:
+        dict: user_id -> {"owe": float, "lent": float}
+    """
+    balances = {}
+    for row in rows:
+        if settle_without_splits and not row["split_count"]:
+            balances[str(row["user_id"])] = {"owe": 0.0, "lent": 0.0}
+            continue
+        balances[str(row["user_id"])] = {
+            "owe": round(float(row["amount_due"]) - float(row["payments_made"]), 2),
+            "lent": round(float(row["amount_paid"]) - float(row["payments_received"]), 2),
+        }
+    return balances
@@ -0,0 +1,97 @@
+"""
+/add-split latency by participant count: the Splits rows inserted one request
+per row, as the endpoint used to, vs the single bulk insert it does now,
+against a local PostgREST stand-in with a fixed round-trip delay.
+
+The last column is the whole endpoint, which also looks up the bill's group
+before inserting. Each run checks the stand-in received one row per participant.
+
+    python benchmarks/bench_add_split.py [--participants 2 5 10 25 50] [--latency-ms 20] [--repeat 3]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("REACT_APP_SUPABASE_ANON_KEY", "benchmark")
+
+import httpx
+
+import backend_script
+from db import Database
+from postgrest_stub import PostgrestStub, start_stub
+
+
+def split_rows(bill_id, user_ids):
+    share = round(100 / len(user_ids), 2)
+    rows = [{"bill_id": bill_id, "user_id": user_id, "amount_due": share, "amount_paid": 0}
+            for user_id in user_ids[1:]]
+    rows.append({"bill_id": bill_id, "user_id": user_ids[0], "amount_due": 0,
+                 "amount_paid": share * (len(user_ids) - 1)})
+    return rows
+
+
+async def row_by_row(rows):
+    for row in rows:
+        await backend_script.db.table("Splits").insert(row).execute()
+
+
+async def bulk(rows):
+    await backend_script.db.table("Splits").insert(rows).execute()
+
+
+async def endpoint(client, bill_id, user_ids):
+    response = await client.post("/add-split", json={
+        "bill_id": bill_id, "item_id": "item", "payer_id": user_ids[0],
+        "user_ids": user_ids, "total_price": 100,
+    })
+    assert response.json()["status"] == "success", response.text
+
+
+async def best_of(repeat, stub, bill_prefix, participants, run):
+    best = float("inf")
+    for i in range(repeat):
+        bill_id = f"{bill_prefix}-{participants}-{i}"
+        stub.tables["Bills"].append({"bill_id": bill_id, "group_id": "group"})
+        start = time.perf_counter()
+        await run(bill_id)
+        best = min(best, time.perf_counter() - start)
+        written = [row for row in stub.tables["Splits"] if row["bill_id"] == bill_id]
+        assert len(written) == participants, f"{len(written)} rows for {participants} participants"
+    return best
+
+
+async def main(args):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("backend_script").setLevel(logging.WARNING)
+    stub = PostgrestStub(latency=args.latency_ms / 1000, tables={"Bills": [], "Splits": []})
+    server, url = start_stub(stub)
+    backend_script.db = Database(url, "benchmark")
+    transport = httpx.ASGITransport(app=backend_script.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            print(f"{'participants':>13} {'row by row ms':>14} {'bulk ms':>9} {'speedup':>8} {'endpoint ms':>12}")
+            for participants in args.participants:
+                user_ids = [f"user-{i}" for i in range(participants)]
+                before = await best_of(args.repeat, stub, "rows", participants,
+                                       lambda bill_id: row_by_row(split_rows(bill_id, user_ids)))
+                after = await best_of(args.repeat, stub, "bulk", participants,
+                                      lambda bill_id: bulk(split_rows(bill_id, user_ids)))
+                whole = await best_of(args.repeat, stub, "endpoint", participants,
+                                      lambda bill_id: endpoint(client, bill_id, user_ids))
+                print(f"{participants:>13} {before * 1000:>14.1f} {after * 1000:>9.1f} "
+                      f"{before / after:>7.1f}x {whole * 1000:>12.1f}")
+    finally:
+        await backend_script.db.close()
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--participants", type=int, nargs="+", default=[2, 5, 10, 25, 50])
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
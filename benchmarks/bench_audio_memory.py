@@ -0,0 +1,111 @@
+"""
+Peak Python memory while /audio-split transcribes long recordings: the old path
+(read the whole upload, write it to a temp file, send it in one request) vs the
+streaming path (send the spooled upload in pieces, at most max_concurrency in
+flight).
+
+Recordings are 16 kHz mono 16-bit WAV, written straight to a spooled temporary
+file like the one Starlette hands the endpoint, and sent to a local stand-in
+for the OpenAI API. Memory is measured with tracemalloc, so it covers Python
+allocations only and includes the stand-in draining the upload.
+
+    python benchmarks/bench_audio_memory.py [--minutes 10 30 60] [--chunk-mb 8] [--concurrency 4]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI
+
+from mock_openai import start_mock
+from voice import Voicee
+
+SAMPLE_RATE = 16000
+NAMES = ["Alice", "Bob", "Carol"]
+
+
+def recording(minutes):
+    # Starlette spools uploads to disk past 1 MB
+    upload = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    with wave.open(upload, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(SAMPLE_RATE)
+        second = bytes(range(256)) * (SAMPLE_RATE * 2 // 256)
+        for _ in range(int(minutes * 60)):
+            writer.writeframes(second)
+    upload.seek(0)
+    return upload
+
+
+def old_path(voice, upload):
+    audio_bytes = upload.read()
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_audio:
+        temp_audio.write(audio_bytes)
+        temp_audio_path = temp_audio.name
+    try:
+        with open(temp_audio_path, "rb") as audio_file:
+            # No chunking: the whole recording goes in one request
+            return voice.transcribe(audio_file, NAMES, chunk_bytes=float("inf"))
+    finally:
+        os.remove(temp_audio_path)
+
+
+def streaming_path(voice, upload, chunk_bytes, concurrency):
+    return voice.transcribe(upload, NAMES, filename="recording.wav", content_type="audio/wav",
+                            chunk_bytes=chunk_bytes, max_concurrency=concurrency)
+
+
+def measure(run):
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        found = run()
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    assert found, "no names found in the transcript"
+    return peak, elapsed
+
+
+def main(args):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    mock, server, url, _ = start_mock(args.latency_ms / 1000)
+    client = OpenAI(api_key="benchmark", base_url=url, max_retries=0)
+    voice = Voicee(client=client)
+    chunk_bytes = int(args.chunk_mb * 1024 * 1024)
+    try:
+        print(f"{'minutes':>8} {'upload MB':>10} {'old peak MB':>12} {'old s':>7} "
+              f"{'stream peak MB':>15} {'stream s':>9} {'pieces':>7}")
+        for minutes in args.minutes:
+            upload = recording(minutes)
+            size = upload.seek(0, os.SEEK_END)
+            upload.seek(0)
+            old_peak, old_time = measure(lambda: old_path(voice, upload))
+            upload.seek(0)
+            before = mock.transcriptions
+            new_peak, new_time = measure(lambda: streaming_path(voice, upload, chunk_bytes, args.concurrency))
+            pieces = mock.transcriptions - before
+            upload.close()
+            print(f"{minutes:>8g} {size / 2**20:>10.1f} {old_peak / 2**20:>12.1f} {old_time:>7.2f} "
+                  f"{new_peak / 2**20:>15.1f} {new_time:>9.2f} {pieces:>7}")
+    finally:
+        client.close()
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, nargs="+", default=[10, 30, 60])
+    parser.add_argument("--chunk-mb", type=float, default=8)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    main(parser.parse_args())
@@ -0,0 +1,91 @@
+"""
+Saving a scanned bill with its items: a Bills insert followed by one Bill_Items
+insert per item, as /scan-bill used to, vs the single create_bill_with_items
+call it makes now, over receipts of increasing length, against a local
+PostgREST stand-in with a fixed round-trip delay.
+
+The stand-in's create_bill_with_items writes the same rows and returns the
+generated ids; each run checks both ways store every item under its bill.
+
+    python benchmarks/bench_bill_persistence.py [--items 5 20 50 100] [--latency-ms 20] [--repeat 3]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("REACT_APP_SUPABASE_ANON_KEY", "benchmark")
+
+import backend_script
+from db import Database
+from postgrest_stub import PostgrestStub, start_stub
+
+
+def create_bill_with_items(stub, params):
+    bill = stub.insert("Bills", [params["p_bill"]])[0]
+    items = stub.insert("Bill_Items", [{**item, "bill_id": bill["bill_id"]} for item in params["p_items"]])
+    return {"bill_id": bill["bill_id"], "item_ids": [item["item_id"] for item in items]}
+
+
+def receipt(items):
+    return [{"item_name": f"item {i}", "quantity": 1, "total_price": 1.5} for i in range(items)]
+
+
+async def one_by_one(bill, items):
+    response = await backend_script.db.table("Bills").insert(bill).execute()
+    bill_id = response.data[0]["bill_id"]
+    item_ids = []
+    for item in items:
+        item_response = await backend_script.db.table("Bill_Items").insert({"bill_id": bill_id, **item}).execute()
+        item_ids.append(item_response.data[0]["item_id"])
+    return bill_id, item_ids
+
+
+async def one_call(bill, items):
+    response = await backend_script.db.rpc("create_bill_with_items", {"p_bill": bill, "p_items": items}).execute()
+    return response.data["bill_id"], response.data["item_ids"]
+
+
+async def best_of(repeat, stub, items, save):
+    best = float("inf")
+    for _ in range(repeat):
+        bill = {"group_id": "group", "uploaded_by": "user", "total_amount": 1.5 * items}
+        start = time.perf_counter()
+        bill_id, item_ids = await save(bill, receipt(items))
+        best = min(best, time.perf_counter() - start)
+        stored = [row["item_id"] for row in stub.tables["Bill_Items"] if row["bill_id"] == bill_id]
+        assert stored == item_ids and len(item_ids) == items, "items missing or out of order"
+    return best
+
+
+async def main(args):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    stub = PostgrestStub(
+        latency=args.latency_ms / 1000,
+        tables={"Bills": [], "Bill_Items": []},
+        rpcs={"create_bill_with_items": create_bill_with_items},
+        keys={"Bills": "bill_id", "Bill_Items": "item_id"},
+    )
+    server, url = start_stub(stub)
+    backend_script.db = Database(url, "benchmark")
+    try:
+        print(f"{'items':>6} {'one by one ms':>14} {'trips':>6} {'one call ms':>12} {'trips':>6} {'speedup':>8}")
+        for items in args.items:
+            before = await best_of(args.repeat, stub, items, one_by_one)
+            after = await best_of(args.repeat, stub, items, one_call)
+            print(f"{items:>6} {before * 1000:>14.1f} {items + 1:>6} {after * 1000:>12.1f} {1:>6} "
+                  f"{before / after:>7.1f}x")
+    finally:
+        await backend_script.db.close()
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[5, 20, 50, 100])
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
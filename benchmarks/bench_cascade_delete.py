@@ -0,0 +1,167 @@
+"""
+/delete-group by group size: the old pipeline of separate selects and deletes
+vs the delete_group_cascade call, with groups over DELETE_BATCH_BILLS bills
+handed to the background job that deletes a batch per delete_group_batch call.
+
+Runs against a local PostgREST stand-in with a fixed round-trip delay whose
+database functions mirror the SQL ones over its in-memory tables, so the
+numbers show round trips and how long the client waits, not the database's
+own delete time. The old pipeline filters items and splits with every bill id
+in the URL; the "old" column shows "failed" once that URL is longer than the
+HTTP client accepts. Every run checks that nothing of the group is left.
+
+    python benchmarks/bench_cascade_delete.py [--bills 10 100 500 2000 5000] [--latency-ms 20]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("REACT_APP_SUPABASE_ANON_KEY", "benchmark")
+
+import httpx
+
+import backend_script
+from db import Database
+from postgrest_stub import PostgrestStub, start_stub
+
+TABLES = ("Groups", "Group_Members", "Bills", "Bill_Items", "Splits", "Payment_Transactions")
+
+
+def delete_where(stub, table, keep):
+    before = len(stub.tables[table])
+    stub.tables[table] = [row for row in stub.tables[table] if keep(row)]
+    return before - len(stub.tables[table])
+
+
+def delete_group_batch(stub, params):
+    group_id, batch_size = params["p_group_id"], params.get("p_batch_size")
+    bill_ids = sorted(row["bill_id"] for row in stub.tables["Bills"] if row["group_id"] == group_id)
+    batch = set(bill_ids[:batch_size] if batch_size else bill_ids)
+    delete_where(stub, "Bill_Items", lambda row: row["bill_id"] not in batch)
+    delete_where(stub, "Splits", lambda row: row["bill_id"] not in batch)
+    deleted = delete_where(stub, "Bills", lambda row: row["bill_id"] not in batch)
+    remaining = len(bill_ids) - deleted
+    if remaining == 0:
+        for table in ("Payment_Transactions", "Group_Members", "Groups"):
+            delete_where(stub, table, lambda row: row["group_id"] != group_id)
+    return {"bills_deleted": deleted, "bills_remaining": remaining, "done": remaining == 0}
+
+
+def delete_group_cascade(stub, params):
+    group_id = params["p_group_id"]
+    group = next((row for row in stub.tables["Groups"] if row["group_id"] == group_id), None)
+    if group is None:
+        return {"status": "not_found"}
+    if group["created_by"] != params["p_user_id"]:
+        return {"status": "forbidden"}
+    bills = sum(row["group_id"] == group_id for row in stub.tables["Bills"])
+    if params.get("p_max_bills") is not None and bills > params["p_max_bills"]:
+        return {"status": "too_large", "bills": bills}
+    delete_group_batch(stub, {"p_group_id": group_id, "p_batch_size": None})
+    return {"status": "deleted", "bills": bills}
+
+
+def add_group(stub, group_id, bills, items=5, members=4):
+    stub.tables["Groups"].append({"group_id": group_id, "created_by": "owner"})
+    stub.tables["Group_Members"].extend({"group_id": group_id, "user_id": f"user-{i}"} for i in range(members))
+    stub.tables["Payment_Transactions"].append({"group_id": group_id, "payer_id": "user-1", "payee_id": "owner"})
+    for b in range(bills):
+        bill_id = f"{group_id}-bill-{b:06d}"
+        stub.tables["Bills"].append({"bill_id": bill_id, "group_id": group_id})
+        stub.tables["Bill_Items"].extend({"bill_id": bill_id, "item_id": f"{bill_id}-{i}"} for i in range(items))
+        stub.tables["Splits"].extend({"bill_id": bill_id, "user_id": f"user-{i}"} for i in range(members))
+
+
+def leftovers(stub, group_id):
+    prefix = f"{group_id}-"
+    return sum(
+        1 for table in TABLES for row in stub.tables[table]
+        if row.get("group_id") == group_id or str(row.get("bill_id", "")).startswith(prefix)
+    )
+
+
+async def old_pipeline(group_id):
+    db = backend_script.db
+    await db.table("Groups").select("*").eq("group_id", group_id).execute()
+    bills = await db.table("Bills").select("bill_id").eq("group_id", group_id).execute()
+    bill_ids = [bill["bill_id"] for bill in bills.data]
+    if bill_ids:
+        await db.table("Bill_Items").delete().in_("bill_id", bill_ids).execute()
+        await db.table("Splits").delete().in_("bill_id", bill_ids).execute()
+        await db.table("Payment_Transactions").delete().eq("group_id", group_id).execute()
+        await db.table("Bills").delete().eq("group_id", group_id).execute()
+    await db.table("Group_Members").delete().eq("group_id", group_id).execute()
+    await db.table("Groups").delete().eq("group_id", group_id).execute()
+
+
+async def endpoint(client, group_id):
+    """
+    Returns (seconds until the response, seconds until the group is gone).
+    """
+    start = time.perf_counter()
+    response = await client.delete("/delete-group", params={"group_id": group_id, "user_id": "owner"})
+    answered = time.perf_counter() - start
+    body = response.json()
+    if response.status_code == 202:
+        job_id = body["data"]["job_id"]
+        while True:
+            job = (await client.get(f"/delete-group/jobs/{job_id}")).json()["data"]
+            if job["status"] in ("succeeded", "failed"):
+                assert job["status"] == "succeeded", job
+                break
+            await asyncio.sleep(0.005)
+    else:
+        assert body["status"] == "success", body
+    return answered, time.perf_counter() - start
+
+
+async def main(args):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    stub = PostgrestStub(
+        latency=args.latency_ms / 1000,
+        tables={table: [] for table in TABLES},
+        rpcs={"delete_group_cascade": delete_group_cascade, "delete_group_batch": delete_group_batch},
+    )
+    server, url = start_stub(stub)
+    backend_script.db = Database(url, "benchmark")
+    await backend_script.delete_jobs.start()
+    transport = httpx.ASGITransport(app=backend_script.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+            print(f"batch size {backend_script.DELETE_BATCH_BILLS} bills, {args.latency_ms:g} ms per round trip")
+            print(f"{'bills':>6} {'old ms':>14} {'trips':>6} {'response ms':>12} {'done ms':>9} {'trips':>6}")
+            for bills in args.bills:
+                group_id = f"old-{bills}"
+                add_group(stub, group_id, bills)
+                stub.reset_counters()
+                start = time.perf_counter()
+                try:
+                    await old_pipeline(group_id)
+                    old = f"{(time.perf_counter() - start) * 1000:.1f}"
+                    assert leftovers(stub, group_id) == 0
+                except Exception:
+                    old = "failed"
+                old_trips = sum(stub.requests.values())
+
+                group_id = f"new-{bills}"
+                add_group(stub, group_id, bills)
+                stub.reset_counters()
+                answered, done = await endpoint(client, group_id)
+                assert leftovers(stub, group_id) == 0, "rows left behind"
+                print(f"{bills:>6} {old:>14} {old_trips:>6} {answered * 1000:>12.1f} {done * 1000:>9.1f} "
+                      f"{sum(stub.requests.values()):>6}")
+    finally:
+        await backend_script.delete_jobs.stop()
+        await backend_script.db.close()
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bills", type=int, nargs="+", default=[10, 100, 500, 2000, 5000])
+    parser.add_argument("--latency-ms", type=float, default=20)
+    asyncio.run(main(parser.parse_args()))
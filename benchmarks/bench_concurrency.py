@@ -0,0 +1,99 @@
+"""
+Throughput of /groups with 1 vs N concurrent clients against a local PostgREST stand-in.
+
+The stand-in answers every table request after a fixed delay, like a remote
+database would. Because the data-access layer is async, concurrent requests
+overlap their round trips and throughput grows with the number of clients;
+a blocking client would stay flat at the single-client rate. The stand-in runs
+in the same process, so at high client counts the numbers become CPU-bound.
+
+    python benchmarks/bench_concurrency.py [--requests 400] [--latency-ms 20] [--clients 1 8 32]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("REACT_APP_SUPABASE_ANON_KEY", "benchmark")
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+import backend_script
+from db import Database
+
+
+def make_stub(latency):
+    async def table(request):
+        await asyncio.sleep(latency)
+        name = request.path_params["table"]
+        if name == "Group_Members":
+            return JSONResponse([{"group_id": "g1"}, {"group_id": "g2"}])
+        if name == "Groups":
+            return JSONResponse([
+                {"group_id": group_id, "group_name": group_id, "created_at": "2026-01-01",
+                 "created_by": "u", "User_info": {"name": "u"}}
+                for group_id in ("g1", "g2")
+            ])
+        return JSONResponse([])
+
+    return Starlette(routes=[Route("/rest/v1/{table}", table, methods=["GET", "POST", "PATCH", "DELETE"])])
+
+
+def start_stub(latency):
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    server = uvicorn.Server(uvicorn.Config(make_stub(latency), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def run(clients, requests):
+    transport = httpx.ASGITransport(app=backend_script.app)
+    counter = iter(range(requests))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for i in counter:
+                # A distinct user per request keeps the response cache out of the measurement
+                response = await client.get("/groups", params={"user_id": f"user-{clients}-{i}"})
+                assert response.json()["status"] == "success", response.text
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(clients)])
+        return time.perf_counter() - start
+
+
+async def main(args):
+    # Per-request INFO logging would dominate the measurement
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    server, url = start_stub(args.latency_ms / 1000)
+    backend_script.db = Database(url, "benchmark")
+    try:
+        print(f"{'clients':>8} {'seconds':>8} {'req/s':>8}")
+        for clients in args.clients:
+            elapsed = await run(clients, args.requests)
+            print(f"{clients:>8} {elapsed:>8.2f} {args.requests / elapsed:>8.1f}")
+    finally:
+        await backend_script.db.close()
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,116 @@
+"""
+Balances of every member of a group: one call to /groups/{group_id}/balances vs
+one /group-expense call per member, sequential and all at once, against a local
+PostgREST stand-in with a fixed round-trip delay.
+
+Every run uses a fresh group so neither the roster cache nor the response cache
+answers for the database, and checks both ways return the same owe/lent.
+
+    python benchmarks/bench_group_balances.py [--members 5 20 100 500] [--latency-ms 20] [--repeat 3]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("REACT_APP_SUPABASE_ANON_KEY", "benchmark")
+
+import httpx
+
+import backend_script
+from db import Database
+from postgrest_stub import PostgrestStub, start_stub
+
+
+def add_group(stub, rng, group_id, members):
+    for i in range(members):
+        user_id = f"{group_id}-user-{i:04d}"
+        stub.tables.setdefault("Group_Members", []).append({
+            "group_id": group_id, "user_id": user_id, "joined_at": "2026-01-01",
+            "User_info": {"name": f"User {i}", "email": f"{user_id}@example.com"},
+        })
+        stub.tables.setdefault("Group_Balances", []).append({
+            "group_id": group_id, "user_id": user_id,
+            "amount_due": rng.randint(0, 50000) / 100, "amount_paid": rng.randint(0, 50000) / 100,
+            "payments_made": rng.randint(0, 5000) / 100, "payments_received": rng.randint(0, 5000) / 100,
+            "split_count": rng.randint(1, 40),
+        })
+    return [f"{group_id}-user-{i:04d}" for i in range(members)]
+
+
+async def one_call(client, group_id):
+    response = (await client.get(f"/groups/{group_id}/balances")).json()
+    assert response["status"] == "success", response
+    return {member["user_id"]: {"owe": member["owe"], "lent": member["lent"]} for member in response["data"]}
+
+
+async def per_member(client, group_id, user_ids, concurrent):
+    async def expense(user_id):
+        response = (await client.get("/group-expense", params={"group_id": group_id, "user_id": user_id})).json()
+        assert response["status"] == "success", response
+        return user_id, response["data"]
+
+    if concurrent:
+        results = await asyncio.gather(*[expense(user_id) for user_id in user_ids])
+    else:
+        results = [await expense(user_id) for user_id in user_ids]
+    return dict(results)
+
+
+async def timed(make_call):
+    start = time.perf_counter()
+    result = await make_call()
+    return time.perf_counter() - start, result
+
+
+async def main(args):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("backend_script").setLevel(logging.WARNING)
+    rng = random.Random(1)
+    stub = PostgrestStub(latency=args.latency_ms / 1000)
+    server, url = start_stub(stub)
+    backend_script.db = Database(url, "benchmark")
+    transport = httpx.ASGITransport(app=backend_script.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            print(f"{'members':>8} {'balances ms':>12} {'trips':>6} {'N seq ms':>10} {'N gather ms':>12} "
+                  f"{'trips':>6} {'speedup':>8}")
+            for members in args.members:
+                best = {"one": float("inf"), "seq": float("inf"), "gather": float("inf")}
+                for repeat in range(args.repeat):
+                    group_id = f"group-{members}-{repeat}"
+                    user_ids = add_group(stub, rng, group_id, members)
+
+                    stub.reset_counters()
+                    elapsed, balances = await timed(lambda: one_call(client, group_id))
+                    best["one"] = min(best["one"], elapsed)
+                    one_trips = sum(stub.requests.values())
+
+                    stub.reset_counters()
+                    elapsed, sequential = await timed(lambda: per_member(client, group_id, user_ids, False))
+                    best["seq"] = min(best["seq"], elapsed)
+                    many_trips = sum(stub.requests.values())
+
+                    # Fresh tags so the response cache does not answer the second pass
+                    backend_script.response_cache.bump("group", group_id)
+                    elapsed, gathered = await timed(lambda: per_member(client, group_id, user_ids, True))
+                    best["gather"] = min(best["gather"], elapsed)
+
+                    assert sequential == gathered == balances, "per-member and group balances disagree"
+                print(f"{members:>8} {best['one'] * 1000:>12.1f} {one_trips:>6} {best['seq'] * 1000:>10.1f} "
+                      f"{best['gather'] * 1000:>12.1f} {many_trips:>6} {best['gather'] / best['one']:>7.1f}x")
+    finally:
+        await backend_script.db.close()
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, nargs="+", default=[5, 20, 100, 500])
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
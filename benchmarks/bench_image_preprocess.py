@@ -0,0 +1,95 @@
+"""
+Bytes sent to the vision model and encode time per receipt image, raw upload vs
+prepare_receipt_image with JPEG and WebP output.
+
+Point --folder at sample receipt photos. Without it, phone-sized synthetic
+receipts (12 MP JPEGs with text on noisy paper) are generated so the script
+runs anywhere; real photos compress differently, so use them for real numbers.
+
+    python benchmarks/bench_image_preprocess.py [--folder receipts/] [--synthetic 5] [--repeat 3]
+"""
+import argparse
+import base64
+import os
+import random
+import sys
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from image_preprocess import prepare_receipt_image
+
+EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".heic")
+
+
+def synthetic_receipt(seed, size=(3024, 4032)):
+    rng = random.Random(seed)
+    image = Image.new("RGB", size, (92, 84, 70))
+    draw = ImageDraw.Draw(image)
+    left, top = size[0] // 6, size[1] // 12
+    right, bottom = size[0] - left, size[1] - top
+    draw.rectangle((left, top, right, bottom), fill=(238, 234, 222))
+    y = top + 80
+    while y < bottom - 80:
+        line = " ".join(rng.choice(["MILK", "BREAD", "EGGS", "TAX", "TOTAL", "1x", "2x"]) for _ in range(3))
+        draw.text((left + 60, y), f"{line}   {rng.randint(1, 9999) / 100:.2f}", fill=(30, 30, 30),
+                  font_size=56)
+        y += 90
+    pixels = np.asarray(image, dtype=np.int16)
+    noise = np.random.default_rng(seed).normal(0, 6, pixels.shape)
+    image = Image.fromarray(np.clip(pixels + noise, 0, 255).astype(np.uint8))
+    with BytesIO() as output:
+        image.save(output, format="JPEG", quality=92)
+        return output.getvalue()
+
+
+def load_images(folder, synthetic):
+    if folder:
+        names = sorted(name for name in os.listdir(folder) if name.lower().endswith(EXTENSIONS))
+        images = []
+        for name in names:
+            with open(os.path.join(folder, name), "rb") as f:
+                images.append((name, f.read()))
+        return images
+    return [(f"synthetic-{i}.jpg", synthetic_receipt(i)) for i in range(synthetic)]
+
+
+def main(args):
+    images = load_images(args.folder, args.synthetic)
+    if not images:
+        print(f"No images found in {args.folder}")
+        return
+    variants = [("JPEG", {"format": "JPEG"}), ("WEBP", {"format": "WEBP"})]
+
+    print(f"{'image':<20} {'raw KB':>9}" + "".join(f" {name + ' KB':>9} {name + ' ms':>9}" for name, _ in variants))
+    totals = {name: [] for name, _ in variants}
+    raw_total = 0
+    for name, data in images:
+        raw_total += len(base64.b64encode(data))
+        row = f"{name[:20]:<20} {len(data) / 1024:>9.1f}"
+        for variant, options in variants:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                encoded, _ = prepare_receipt_image(data, **options)
+                timings.append(time.perf_counter() - start)
+            totals[variant].append(len(base64.b64encode(encoded)))
+            row += f" {len(encoded) / 1024:>9.1f} {min(timings) * 1000:>9.1f}"
+        print(row)
+
+    print(f"\nbase64 payload over {len(images)} image(s): raw {raw_total / 1024:.0f} KB", end="")
+    for variant, sizes in totals.items():
+        print(f", {variant} {sum(sizes) / 1024:.0f} KB ({raw_total / sum(sizes):.1f}x smaller)", end="")
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--folder", help="Directory of sample receipt photos")
+    parser.add_argument("--synthetic", type=int, default=5, help="Synthetic receipts when no folder is given")
+    parser.add_argument("--repeat", type=int, default=3)
+    main(parser.parse_args())
@@ -0,0 +1,87 @@
+"""
+Per-request latency of an OpenAI call with a client built per request, as the
+endpoints used to do, vs the long-lived pooled client from clients.ClientRegistry.
+
+Both go to a local stand-in for the API that answers after a fixed delay, over
+HTTPS by default so a fresh client pays for its TCP and TLS setup like it would
+against api.openai.com. The difference between the two columns is what the
+registry saves on every request.
+
+    python benchmarks/bench_openai_clients.py [--requests 50] [--latency-ms 50] [--no-tls]
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI
+
+from clients import ClientRegistry
+from gpt_4_parser import Bill_parser
+from mock_openai import start_mock
+
+
+def per_request(requests):
+    timings = []
+    for i in range(requests):
+        start = time.perf_counter()
+        client = OpenAI(api_key="benchmark")
+        try:
+            Bill_parser(client=client).translate_item(f"item {i}", "grocery")
+        finally:
+            client.close()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def shared(requests):
+    registry = ClientRegistry()
+    registry.start(api_key="benchmark")
+    registry.warm_up()
+    try:
+        timings = []
+        for i in range(requests):
+            start = time.perf_counter()
+            registry.bill_parser.translate_item(f"item {i}", "grocery")
+            timings.append(time.perf_counter() - start)
+        return timings
+    finally:
+        registry.close()
+
+
+def report(name, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{name:>12} {statistics.mean(timings) * 1000:>9.2f} "
+          f"{statistics.median(timings) * 1000:>9.2f} {p95 * 1000:>9.2f}")
+    return statistics.mean(timings)
+
+
+def main(args):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    mock, server, url, certfile = start_mock(args.latency_ms / 1000, tls=not args.no_tls)
+    os.environ["OPENAI_BASE_URL"] = url
+    os.environ["TRANSLATION_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "translations.sqlite3")
+    if certfile:
+        os.environ["SSL_CERT_FILE"] = certfile
+    try:
+        print(f"{'https' if certfile else 'http'} stand-in, {args.latency_ms:g} ms per completion")
+        print(f"{'client':>12} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+        fresh = report("per request", per_request(args.requests))
+        pooled = report("shared", shared(args.requests))
+        print(f"saved per request: {(fresh - pooled) * 1000:.2f} ms")
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--no-tls", action="store_true", help="Serve the stand-in over plain HTTP")
+    main(parser.parse_args())
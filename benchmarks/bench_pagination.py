@@ -0,0 +1,170 @@
+"""
+Response size and latency of /friends and /groups for a user with thousands of
+friends and groups, against a local PostgREST stand-in with a fixed round-trip
+delay: the whole list in one response, the first keyset page, every page walked
+through next_cursor, and the NDJSON /stream variant (time to first row and to
+the last one). The app is served over a local socket, since the in-process
+ASGI transport hands back a streamed body only once it is complete.
+
+User_info and Groups rows carry the extra columns a real row has, so the bytes
+read from the database show what the id/name projection saves over select=*.
+The response cache is bumped before every /groups call so each one is built.
+
+    python benchmarks/bench_pagination.py [--sizes 1000 5000] [--limit 50] [--latency-ms 20] [--repeat 3]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("REACT_APP_SUPABASE_ANON_KEY", "benchmark")
+
+import httpx
+
+import backend_script
+from db import Database
+from postgrest_stub import PostgrestStub, serve, start_stub
+
+
+def add_user(stub, user_id, size):
+    """
+    Gives user_id size friends and size groups, each group created by one of the friends.
+    """
+    tables = stub.tables
+    for i in range(size):
+        friend_id = f"{user_id}-friend-{i:05d}"
+        group_id = f"{user_id}-group-{i:05d}"
+        tables.setdefault("Friends", []).append({"user_id": user_id, "friend_id": friend_id})
+        tables.setdefault("User_info", []).append({
+            "id": friend_id, "name": f"Friend {i}", "email": f"{friend_id}@example.com",
+            "created_at": "2026-01-01T00:00:00+00:00", "phone": "+1 555 0100",
+            "avatar_url": f"https://example.com/avatars/{friend_id}.png",
+        })
+        tables.setdefault("Group_Members", []).append({
+            "group_id": group_id, "user_id": user_id, "joined_at": "2026-01-01T00:00:00+00:00",
+        })
+        tables.setdefault("Groups", []).append({
+            "group_id": group_id, "group_name": f"Group {i}", "created_at": "2026-01-01T00:00:00+00:00",
+            "created_by": friend_id, "description": "Trip expenses " * 4, "currency": "USD",
+            "User_info": {"name": f"Friend {i}", "email": f"{friend_id}@example.com"},
+        })
+
+
+async def whole(client, path, user_id):
+    response = await client.get(path, params={"user_id": user_id})
+    body = response.json()
+    assert body["status"] == "success", body
+    return len(body["data"]), len(response.content), None
+
+
+async def first_page(client, path, user_id, limit):
+    response = await client.get(path, params={"user_id": user_id, "limit": limit})
+    body = response.json()
+    assert body["status"] == "success" and len(body["data"]) == limit, body
+    return len(body["data"]), len(response.content), None
+
+
+async def every_page(client, path, user_id, limit, before_call):
+    rows, size, cursor = 0, 0, None
+    while True:
+        before_call()
+        params = {"user_id": user_id, "limit": limit}
+        if cursor is not None:
+            params["cursor"] = cursor
+        response = await client.get(path, params=params)
+        body = response.json()
+        assert body["status"] == "success", body
+        rows += len(body["data"])
+        size += len(response.content)
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return rows, size, None
+
+
+async def stream(client, path, user_id, page_size, start):
+    rows, size, first = 0, 0, None
+    async with client.stream("GET", f"{path}/stream", params={"user_id": user_id, "page_size": page_size}) as response:
+        async for line in response.aiter_lines():
+            if first is None:
+                first = time.perf_counter() - start
+            rows += bool(line)
+            size += len(line) + 1
+    return rows, size, first
+
+
+# Detail table, key column and id infix behind each list endpoint
+DETAILS = {"/friends": ("User_info", "id", "friend"), "/groups": ("Groups", "group_id", "group")}
+
+
+async def unprojected_bytes(stub, db, table, column, ids):
+    """
+    Bytes the database sends for the detail rows of ids with select=* instead of
+    the projected columns.
+    """
+    stub.reset_counters()
+    await db.fetch_in(lambda: db.table(table).select("*"), column, ids)
+    return stub.bytes_sent
+
+
+async def main(args):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    stub = PostgrestStub(latency=args.latency_ms / 1000)
+    server, url = start_stub(stub)
+    backend_script.db = Database(url, "benchmark")
+    # No lifespan: the app's database client connects on first use, on the server's loop
+    app_server, app_url = serve(backend_script.app, lifespan="off")
+    db = Database(url, "benchmark")
+    try:
+        async with httpx.AsyncClient(base_url=app_url, timeout=300) as client:
+            print(f"{'endpoint':>9} {'size':>6} {'mode':>14} {'rows':>6} {'first ms':>9} {'total ms':>9} "
+                  f"{'resp KB':>8} {'db KB':>8} {'trips':>6}")
+            for size in args.sizes:
+                user_id = f"user-{size}"
+                add_user(stub, user_id, size)
+                for path in ("/friends", "/groups"):
+                    def fresh():
+                        backend_script.response_cache.bump("user", user_id)
+
+                    modes = {
+                        "whole": lambda: whole(client, path, user_id),
+                        f"page {args.limit}": lambda: first_page(client, path, user_id, args.limit),
+                        f"all pages {args.limit}": lambda: every_page(client, path, user_id, args.limit, fresh),
+                        "stream 500": lambda: stream(client, path, user_id, 500, start),
+                    }
+                    for mode, call in modes.items():
+                        best = None
+                        for _ in range(args.repeat):
+                            fresh()
+                            stub.reset_counters()
+                            start = time.perf_counter()
+                            rows, body_size, first = await call()
+                            elapsed = time.perf_counter() - start
+                            run = (elapsed, first, rows, body_size, stub.bytes_sent, sum(stub.requests.values()))
+                            if best is None or run[0] < best[0]:
+                                best = run
+                        elapsed, first, rows, body_size, db_bytes, trips = best
+                        first_ms = f"{first * 1000:.1f}" if first is not None else "-"
+                        print(f"{path:>9} {size:>6} {mode:>14} {rows:>6} {first_ms:>9} {elapsed * 1000:>9.1f} "
+                              f"{body_size / 1024:>8.1f} {db_bytes / 1024:>8.1f} {trips:>6}")
+
+                    table, column, kind = DETAILS[path]
+                    ids = [f"{user_id}-{kind}-{i:05d}" for i in range(size)]
+                    db_bytes = await unprojected_bytes(stub, db, table, column, ids)
+                    print(f"{path:>9} {size:>6} {'details *':>14} {size:>6} {'-':>9} {'-':>9} {'-':>8} "
+                          f"{db_bytes / 1024:>8.1f} {'-':>6}")
+    finally:
+        await db.close()
+        app_server.should_exit = True
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
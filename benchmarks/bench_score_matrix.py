@@ -0,0 +1,105 @@
+"""
+Vectorized transcript x roster scoring (NameIndex.match_words) vs the per-word,
+per-name loop it replaced, on long transcripts and large rosters.
+
+Both use the same scorers, the 65 threshold and the +10 phonetic boost; every
+run checks that they pick the same names with the same scores. Rosters are
+synthetic names; transcripts mix roster names with a one-letter typo and filler
+words, and "filler" counts filler words each side wrongly matched to some name.
+
+    python benchmarks/bench_score_matrix.py [--words 100 1000] [--roster 20 200 1000] [--seed 1]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jellyfish
+from thefuzz import fuzz as thefuzz
+
+from voice import NameIndex
+
+SYLLABLES = ["an", "ra", "mi", "ko", "li", "sa", "ta", "ve", "ni", "jo", "el", "da", "ri", "su", "ya", "mo",
+             "ha", "ze", "pa", "lo", "be", "ka", "no", "gi", "fe", "ul", "ch", "sh", "th", "or"]
+FILLERS = ["split", "the", "bill", "with", "and", "pizza", "dinner", "between", "paid", "for", "taxi", "share"]
+
+
+def roster(rng, size):
+    names = set()
+    while len(names) < size:
+        names.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize())
+    return sorted(names)
+
+
+def with_typo(rng, name):
+    i = rng.randrange(len(name))
+    return name[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + name[i + 1:]
+
+
+def transcript(rng, names, words):
+    """
+    Returns (word, is_name) pairs.
+    """
+    return [
+        (with_typo(rng, rng.choice(names)), True) if rng.random() < 0.4 else (rng.choice(FILLERS), False)
+        for _ in range(words)
+    ]
+
+
+def full_scan(word, valid_names, threshold=65):
+    word_lower = word.lower()
+    word_soundex = jellyfish.soundex(word)
+    word_metaphone = jellyfish.metaphone(word)
+    best_match = None
+    best_score = 0
+    for valid_name in valid_names:
+        name_lower = valid_name.lower()
+        max_score = max(
+            thefuzz.ratio(word_lower, name_lower),
+            thefuzz.partial_ratio(word_lower, name_lower),
+            jellyfish.jaro_winkler_similarity(word_lower, name_lower) * 100,
+        )
+        if word_soundex == jellyfish.soundex(valid_name) or word_metaphone == jellyfish.metaphone(valid_name):
+            max_score += 10
+        if max_score > best_score:
+            best_score = max_score
+            best_match = valid_name
+    return (best_match, best_score) if best_score >= threshold else (None, 0)
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    print(f"{'words':>6} {'roster':>7} {'loop ms':>10} {'matrix ms':>10} {'speedup':>8} {'same':>6} {'filler':>9}")
+    for size in args.roster:
+        names = roster(rng, size)
+        index = NameIndex(names)
+        for count in args.words:
+            tokens = transcript(rng, names, count)
+            words = [word for word, _ in tokens]
+
+            start = time.perf_counter()
+            looped = [full_scan(word, names) for word in words]
+            loop = time.perf_counter() - start
+
+            start = time.perf_counter()
+            matched = index.match_words(words)
+            matrix = time.perf_counter() - start
+
+            same = sum(
+                a[0] == b[0] and abs(a[1] - b[1]) < 1e-6 for a, b in zip(looped, matched)
+            ) / len(words)
+            filler_loop = sum(a[0] is not None for (_, is_name), a in zip(tokens, looped) if not is_name)
+            filler_matrix = sum(b[0] is not None for (_, is_name), b in zip(tokens, matched) if not is_name)
+            print(f"{count:>6} {size:>7} {loop * 1000:>10.1f} {matrix * 1000:>10.1f} "
+                  f"{loop / matrix:>7.1f}x {same:>6.1%} {filler_loop:>4}/{filler_matrix:<4}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--roster", type=int, nargs="+", default=[20, 200, 1000])
+    parser.add_argument("--seed", type=int, default=1)
+    main(parser.parse_args())
@@ -0,0 +1,52 @@
+"""
+How settle_up scales with group size, and how many transfers it plans.
+
+Balances are random and sum to zero. The plan should grow roughly as n log n
+in time and never need more than n - 1 transfers, against the n(n-1)/2 pairs
+a naive pairwise settlement could produce.
+
+    python benchmarks/bench_settle_up.py [--sizes 10 100 1000 10000 100000] [--repeat 5] [--seed 1]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from settle_up import settle_up
+
+
+def random_balances(rng, users):
+    net = {f"user-{i:06d}": rng.randint(-100000, 100000) for i in range(users - 1)}
+    net[f"user-{users - 1:06d}"] = -sum(net.values())
+    return net
+
+
+def run(sizes, repeat, seed):
+    rng = random.Random(seed)
+    print(f"{'users':>8} {'best ms':>10} {'us/user':>9} {'transfers':>10} {'n - 1':>8}")
+    for users in sizes:
+        net = random_balances(rng, users)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            transfers = settle_up(net)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        print(f"{users:>8} {best * 1000:>10.2f} {best / users * 1e6:>9.2f} "
+              f"{len(transfers):>10} {users - 1:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Bill_parser.translate on receipts of 5, 30 and 100 items against a local
+stand-in for the OpenAI API with a fixed completion delay.
+
+Concurrency 1 is the old one-request-after-another behaviour. Every run checks
+that each item got its own translation back in order, and reports the most
+requests the stand-in saw at once so the concurrency bound can be checked.
+
+    python benchmarks/bench_translate.py [--items 5 30 100] [--concurrency 1 8 16] [--latency-ms 200]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI
+
+from gpt_4_parser import Bill_parser
+from mock_openai import start_mock
+
+
+def receipt(items):
+    return {
+        "bill_category": "grocery",
+        "items": [
+            {"item_name": f"item {i}", "quantity": 1, "price_per_unit": 1.0, "total_price": 1.0}
+            for i in range(items)
+        ],
+    }
+
+
+def main(args):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    mock, server, url, _ = start_mock(args.latency_ms / 1000)
+    client = OpenAI(api_key="benchmark", base_url=url, max_retries=0)
+    # No translation cache, so every item reaches the stand-in
+    parser = Bill_parser(client=client)
+    try:
+        print(f"{args.latency_ms:g} ms per completion")
+        print(f"{'items':>6} {'concurrency':>12} {'seconds':>8} {'peak':>6} {'speedup':>8}")
+        for items in args.items:
+            baseline = None
+            for concurrency in args.concurrency:
+                bill = receipt(items)
+                mock.peak_in_flight = 0
+                start = time.perf_counter()
+                parser.translate(bill, max_concurrency=concurrency)
+                elapsed = time.perf_counter() - start
+                names = [item["item_name"] for item in bill["items"]]
+                assert names == [f"ITEM {i}" for i in range(items)], "translations out of order"
+                baseline = baseline or elapsed
+                print(f"{items:>6} {concurrency:>12} {elapsed:>8.2f} {mock.peak_in_flight:>6} "
+                      f"{baseline / elapsed:>7.1f}x")
+    finally:
+        client.close()
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[5, 30, 100])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 16])
+    parser.add_argument("--latency-ms", type=float, default=200)
+    main(parser.parse_args())
@@ -0,0 +1,121 @@
+"""
+Local stand-in for the OpenAI API used by the benchmarks.
+
+Chat completions answer after a fixed delay with the user message echoed back
+upper-cased, so translations are recognisable; transcriptions drain the upload
+without keeping it and answer with a fixed sentence after the same delay;
+/models answers at once so a warm-up costs only the connection. With tls=True it serves HTTPS from a
+throwaway self-signed certificate made with the openssl command line tool;
+point SSL_CERT_FILE at the returned certificate so clients trust it.
+"""
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+
+class MockOpenAI:
+    def __init__(self, latency=0.05, transcript="Split this with Alice and Bob"):
+        """
+        Args:
+            latency (float): Seconds each chat completion or transcription takes
+            transcript (str): Text every transcription returns
+        """
+        self.latency = latency
+        self.transcript = transcript
+        self.completions = 0
+        self.transcriptions = 0
+        self.bytes_received = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def chat_completions(self, request):
+        body = await request.json()
+        self.completions += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        content = body["messages"][-1]["content"]
+        if not isinstance(content, str):
+            content = "{}"
+        return JSONResponse({
+            "id": f"chatcmpl-{self.completions}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content.upper(), "refusal": None},
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        })
+
+    async def audio_transcriptions(self, request):
+        async for chunk in request.stream():
+            self.bytes_received += len(chunk)
+        self.transcriptions += 1
+        await asyncio.sleep(self.latency)
+        return PlainTextResponse(self.transcript)
+
+    async def models(self, request):
+        return JSONResponse({"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]})
+
+    def app(self):
+        return Starlette(routes=[
+            Route("/v1/chat/completions", self.chat_completions, methods=["POST"]),
+            Route("/v1/audio/transcriptions", self.audio_transcriptions, methods=["POST"]),
+            Route("/v1/models", self.models, methods=["GET"]),
+        ])
+
+
+def self_signed_certificate(directory):
+    keyfile = os.path.join(directory, "key.pem")
+    certfile = os.path.join(directory, "cert.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1", "-keyout", keyfile, "-out", certfile],
+        check=True, capture_output=True,
+    )
+    return keyfile, certfile
+
+
+def start_mock(latency=0.05, tls=False):
+    """
+    Serves a MockOpenAI on a free local port from a background thread.
+
+    Returns:
+        tuple: (MockOpenAI, uvicorn.Server, base URL ending in /v1, certificate path or
+            None when serving plain HTTP)
+    """
+    mock = MockOpenAI(latency)
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    ssl_options = {}
+    certfile = None
+    if tls and shutil.which("openssl") is not None:
+        keyfile, certfile = self_signed_certificate(tempfile.mkdtemp())
+        ssl_options = {"ssl_keyfile": keyfile, "ssl_certfile": certfile}
+
+    config = uvicorn.Config(mock.app(), host="127.0.0.1", port=port, log_level="warning", **ssl_options)
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    scheme = "https" if certfile else "http"
+    return mock, server, f"{scheme}://127.0.0.1:{port}/v1", certfile
@@ -0,0 +1,198 @@
+"""
+In-memory stand-in for PostgREST used by the benchmarks.
+
+It understands the part of the PostgREST protocol the app uses: select with
+plain columns, "*" and embedded resources (returned as stored on the row), eq,
+neq, gt, lt and in filters, order, offset and limit, bulk inserts, deletes and
+POST /rpc/<name> calls to Python functions. Inserted rows get a generated id in
+their table's key column when they lack one. Every request waits a fixed delay
+first, like a round trip to a remote database, and is counted per table.
+"""
+import asyncio
+import json
+import socket
+import threading
+import time
+import uuid
+from collections import Counter
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+
+RESERVED = ("select", "order", "offset", "limit", "columns", "on_conflict")
+
+
+def split_top_level(text):
+    parts, depth, current = [], 0, ""
+    for char in text:
+        if char == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def project(row, select):
+    if not select or select == "*":
+        return dict(row)
+    projected = {}
+    for column in split_top_level(select):
+        if column == "*":
+            projected.update(row)
+        elif "(" in column:
+            name, inner = column.split("(", 1)
+            embedded = row.get(name.strip())
+            if isinstance(embedded, dict):
+                embedded = project(embedded, inner[:-1])
+            projected[name.strip()] = embedded
+        else:
+            projected[column] = row.get(column)
+    return projected
+
+
+def parse_in(value):
+    return [item.strip().strip('"') for item in split_top_level(value[1:-1])]
+
+
+def parse_filters(params):
+    """
+    (column, operator, value) triples from the query string; in lists become sets.
+    """
+    filters = []
+    for column, condition in params.multi_items():
+        if column in RESERVED:
+            continue
+        op, _, value = condition.partition(".")
+        filters.append((column, op, set(parse_in(value)) if op == "in" else value))
+    return filters
+
+
+def matches(row, filters):
+    for column, op, value in filters:
+        actual = row.get(column)
+        actual = None if actual is None else str(actual)
+        if op == "eq" and actual != value:
+            return False
+        if op == "neq" and actual == value:
+            return False
+        if op == "gt" and not (actual is not None and actual > value):
+            return False
+        if op == "lt" and not (actual is not None and actual < value):
+            return False
+        if op == "in" and actual not in value:
+            return False
+    return True
+
+
+class PostgrestStub:
+    def __init__(self, latency=0.02, tables=None, rpcs=None, keys=None):
+        """
+        Args:
+            latency (float): Seconds every request waits before it is answered
+            tables (dict): Table name -> list of row dicts
+            rpcs (dict): Function name -> callable(stub, params) returning the result
+            keys (dict): Table name -> key column filled with a uuid on insert
+        """
+        self.latency = latency
+        self.tables = tables if tables is not None else {}
+        self.rpcs = rpcs or {}
+        self.keys = keys or {}
+        self.requests = Counter()
+        self.bytes_sent = 0
+
+    def reset_counters(self):
+        self.requests.clear()
+        self.bytes_sent = 0
+
+    def respond(self, content, status_code=200):
+        body = json.dumps(content, default=str).encode()
+        self.bytes_sent += len(body)
+        return Response(body, status_code=status_code, media_type="application/json")
+
+    def insert(self, name, rows):
+        key = self.keys.get(name)
+        rows = [dict(row) for row in rows]
+        for row in rows:
+            if key and row.get(key) is None:
+                row[key] = str(uuid.uuid4())
+        self.tables.setdefault(name, []).extend(rows)
+        return rows
+
+    def select(self, name, params):
+        filters = parse_filters(params)
+        rows = [row for row in self.tables.get(name, []) if matches(row, filters)]
+        for order in reversed(params.get("order", "").split(",") if params.get("order") else []):
+            column, _, direction = order.partition(".")
+            rows.sort(key=lambda row: (row.get(column) is None, str(row.get(column))),
+                      reverse=direction.startswith("desc"))
+        offset = int(params.get("offset", 0))
+        limit = params.get("limit")
+        rows = rows[offset:offset + int(limit)] if limit is not None else rows[offset:]
+        return [project(row, params.get("select")) for row in rows]
+
+    async def table(self, request):
+        await asyncio.sleep(self.latency)
+        name = request.path_params["table"]
+        self.requests[name] += 1
+        if request.method == "GET":
+            return self.respond(self.select(name, request.query_params))
+        if request.method == "POST":
+            payload = json.loads(await request.body())
+            rows = self.insert(name, payload if isinstance(payload, list) else [payload])
+            return self.respond(rows, status_code=201)
+        if request.method == "DELETE":
+            filters = parse_filters(request.query_params)
+            kept, deleted = [], []
+            for row in self.tables.get(name, []):
+                (deleted if matches(row, filters) else kept).append(row)
+            self.tables[name] = kept
+            return self.respond(deleted)
+        return self.respond({"message": f"{request.method} is not supported"}, status_code=405)
+
+    async def rpc(self, request):
+        await asyncio.sleep(self.latency)
+        name = request.path_params["name"]
+        self.requests[f"rpc/{name}"] += 1
+        params = json.loads(await request.body() or b"{}")
+        return self.respond(self.rpcs[name](self, params))
+
+    def app(self):
+        return Starlette(routes=[
+            Route("/rest/v1/rpc/{name}", self.rpc, methods=["POST"]),
+            Route("/rest/v1/{table}", self.table, methods=["GET", "POST", "DELETE"]),
+        ])
+
+
+def serve(app, **options):
+    """
+    Serves an ASGI app on a free local port from a background thread.
+
+    Returns:
+        tuple: (uvicorn.Server, base URL)
+    """
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", **options))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def start_stub(stub):
+    """
+    Serves a PostgrestStub on a free local port from a background thread.
+
+    Returns:
+        tuple: (uvicorn.Server, Supabase-style project URL)
+    """
+    return serve(stub.app())
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    def __init__(self, maxsize=1024, ttl=None):
+        """
+        Thread-safe in-memory LRU cache with optional per-entry expiry.
+
+        Args:
+            maxsize (int): Maximum number of entries before the least recently used is evicted
+            ttl (float): Seconds an entry stays valid, or None to keep it until evicted
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value for key, or default if it is missing or expired.
+        """
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self.data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """
+        Stores value under key, evicting the least recently used entry when full.
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self.lock:
+            self.data[key] = (value, expires_at)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """
+        Removes key and returns its value, or default if it is not cached.
+        """
+        with self.lock:
+            entry = self.data.pop(key, None)
+            return entry[0] if entry is not None else default
+
+    def items(self):
+        """
+        Returns a snapshot of the (key, value) pairs that have not expired.
+        """
+        now = time.monotonic()
+        with self.lock:
+            return [
+                (key, value)
+                for key, (value, expires_at) in self.data.items()
+                if expires_at is None or expires_at > now
+            ]
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+    def __len__(self):
+        return len(self.data)
+
+    def stats(self):
+        """
+        Returns hit/miss counters and current size.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self.data),
+            "maxsize": self.maxsize,
+        }
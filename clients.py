@@ -0,0 +1,70 @@
+import logging
+import os
+
+import httpx
+from openai import OpenAI, DefaultHttpxClient
+
+from gpt_4_parser import Bill_parser
+from metrics import metered_call
+from translation_cache import TranslationCache
+from voice import Voicee
+
+logger = logging.getLogger(__name__)
+
+
+class ClientRegistry:
+    def __init__(self, max_connections=50, max_keepalive_connections=20,
+                 keepalive_expiry=60.0, timeout=60.0):
+        """
+        Holds the long-lived OpenAI client and the services built on it.
+
+        Args:
+            max_connections (int): Upper bound on open connections to OpenAI
+            max_keepalive_connections (int): Idle connections kept open for reuse
+            keepalive_expiry (float): Seconds an idle connection is kept alive
+            timeout (float): Per-request timeout in seconds
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout
+        self.openai = None
+        self.translation_cache = None
+        self.bill_parser = None
+        self.voice = None
+
+    def start(self, api_key=None):
+        """
+        Creates the shared client and services. Called once from the application lifespan.
+        """
+        self.openai = OpenAI(
+            api_key=api_key or os.getenv("OPENAI_API_KEY"),
+            http_client=DefaultHttpxClient(limits=self.limits, timeout=self.timeout),
+        )
+        self.translation_cache = TranslationCache(
+            path=os.getenv("TRANSLATION_CACHE_PATH", "translation_cache.sqlite3")
+        )
+        self.bill_parser = Bill_parser(client=self.openai, translation_cache=self.translation_cache)
+        self.voice = Voicee(client=self.openai)
+
+    def warm_up(self):
+        """
+        Opens a connection to the API ahead of the first request so it pays no TLS setup.
+        """
+        try:
+            metered_call("warm_up", self.openai.with_options(timeout=5.0, max_retries=0).models.list)
+        except Exception as e:
+            logger.warning(f"OpenAI warm-up failed: {str(e)}")
+
+    def close(self):
+        """
+        Closes the shared connection pool.
+        """
+        if self.openai is not None:
+            self.openai.close()
+            self.openai = None
+        if self.translation_cache is not None:
+            self.translation_cache.close()
+            self.translation_cache = None
@@ -0,0 +1,2 @@
+# Supabase project shared by the API and the command line tools
+supabase_url = "https://ltpasfjejihckukshlhs.supabase.co"
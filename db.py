@@ -0,0 +1,193 @@
+import asyncio
+import time
+
+import httpx
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
+
+from metrics import SUPABASE_REQUEST_DURATION, SUPABASE_REQUEST_ERRORS
+
+
+class MeteredTransport(httpx.AsyncBaseTransport):
+    """
+    Transport wrapper timing every PostgREST call, labelled with its table or rpc name.
+    """
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    async def handle_async_request(self, request):
+        # /rest/v1/<table> or /rest/v1/rpc/<function>
+        table = request.url.path.split("/rest/v1/", 1)[-1] or "unknown"
+        start = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception:
+            SUPABASE_REQUEST_ERRORS.inc(table=table, method=request.method)
+            raise
+        finally:
+            SUPABASE_REQUEST_DURATION.observe(time.perf_counter() - start, table=table, method=request.method)
+        if response.status_code >= 400:
+            SUPABASE_REQUEST_ERRORS.inc(table=table, method=request.method)
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """
+    PostgREST client whose session is a tuned, keep-alive HTTP/2 connection pool.
+    """
+
+    def __init__(self, base_url, limits, **kwargs):
+        self.limits = limits
+        super().__init__(base_url, **kwargs)
+
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+        transport = httpx.AsyncHTTPTransport(
+            verify=verify,
+            proxy=proxy,
+            http2=True,
+            limits=self.limits,
+        )
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            follow_redirects=True,
+            transport=MeteredTransport(transport),
+        )
+
+
+class Database:
+    def __init__(self, url, key, max_connections=100, max_keepalive_connections=20,
+                 keepalive_expiry=30.0, timeout=10.0):
+        """
+        Async data-access layer shared by every endpoint.
+
+        Args:
+            url (str): Supabase project URL
+            key (str): Supabase API key
+            max_connections (int): Upper bound on open connections in the pool
+            max_keepalive_connections (int): Idle connections kept open for reuse
+            keepalive_expiry (float): Seconds an idle connection is kept alive
+            timeout (float): Per-request timeout in seconds
+        """
+        self.rest_url = f"{url}/rest/v1"
+        self.headers = {
+            **DEFAULT_POSTGREST_CLIENT_HEADERS,
+            "apiKey": key,
+            "Authorization": f"Bearer {key}",
+        }
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout
+        self.client = None
+
+    def connect(self):
+        """
+        Creates the pooled client. Called once from the application lifespan.
+        """
+        if self.client is None:
+            self.client = PooledPostgrestClient(
+                self.rest_url,
+                self.limits,
+                headers=self.headers,
+                timeout=self.timeout,
+            )
+        return self.client
+
+    async def close(self):
+        """
+        Closes the pooled connections.
+        """
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def table(self, table_name):
+        """
+        Starts an async query on a table. Finish it with `await ... .execute()`.
+        """
+        return self.connect().table(table_name)
+
+    def rpc(self, func, params):
+        """
+        Starts an async call to a database function.
+        """
+        return self.connect().rpc(func, params)
+
+    async def fetch_all(self, make_query, page_size=1000):
+        """
+        Runs a select page by page so results are not cut off at the server's row limit.
+
+        Args:
+            make_query: Callable returning a fresh, fully ordered select query; called once per page
+            page_size (int): Rows requested per round trip
+
+        Returns:
+            list: Every matching row
+        """
+        rows = []
+        while True:
+            response = await make_query().range(len(rows), len(rows) + page_size - 1).execute()
+            rows.extend(response.data)
+            if len(response.data) < page_size:
+                return rows
+
+    async def fetch_in(self, make_query, column, values, chunk_size=200):
+        """
+        Runs an `in` filter over a long id list in chunks, concurrently, so no request
+        URL grows with the list.
+
+        Args:
+            make_query: Callable returning a fresh select query to add the filter to
+            column (str): Column the ids are matched against
+            values (list): Ids to match
+            chunk_size (int): Ids per request
+
+        Returns:
+            list: Rows from every chunk, in chunk order
+        """
+        values = list(values)
+        responses = await asyncio.gather(*[
+            make_query().in_(column, values[i:i + chunk_size]).execute()
+            for i in range(0, len(values), chunk_size)
+        ])
+        return [row for response in responses for row in response.data]
+
+    async def fetch_page(self, make_query, key, limit, cursor=None):
+        """
+        Fetches one keyset page: up to limit rows ordered by key, starting after cursor.
+
+        Args:
+            make_query: Callable returning a fresh select query; key must be unique within it
+            key (str): Column to order and page by
+            limit (int): Rows per page
+            cursor: Key of the last row of the previous page, None for the first page
+
+        Returns:
+            tuple: (rows, next_cursor), next_cursor being None on the last page
+        """
+        query = make_query().order(key).limit(limit + 1)
+        if cursor is not None:
+            query = query.gt(key, cursor)
+        rows = (await query.execute()).data
+        if len(rows) > limit:
+            return rows[:limit], rows[limit - 1][key]
+        return rows, None
+
+    async def iter_pages(self, make_query, key, page_size=1000):
+        """
+        Yields every row of a keyset-paged select, one page (list of rows) at a time.
+        """
+        cursor = None
+        while True:
+            rows, cursor = await self.fetch_page(make_query, key, page_size, cursor)
+            yield rows
+            if cursor is None:
+                return
@@ -5,14 +5,67 @@ import os
 from dotenv import load_dotenv
 import base64
 import json
+import logging
 import re
 import requests
 from PIL import Image
+from pydantic import BaseModel, ValidationError
+from typing import List, Optional, Union
+from image_preprocess import prepare_receipt_image
+from metrics import metered_call
+
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+class ReceiptItem(BaseModel):
+    item_name: str
+    quantity: Union[int, float]
+    price_per_unit: float
+    total_price: float
+
+class Receipt(BaseModel):
+    items: List[ReceiptItem]
+    people: List[str]
+    bill_category: str
+
+
+# Replies parsed without structured output need only what /scan-bill reads
+class LooseReceiptItem(ReceiptItem):
+    price_per_unit: Optional[float] = None
+
+class LooseReceipt(Receipt):
+    items: List[LooseReceiptItem]
+    people: List[str] = []
+
+
+def extract_json(text):
+    """
+    Returns the first JSON object in text, fenced or not, or None if there is none.
+    """
+    match = re.search(r"```(?:json)?(.*?)```", text, re.DOTALL)
+    if match:
+        text = match.group(1)
+    decoder = json.JSONDecoder()
+    start = text.find("{")
+    while start != -1:
+        try:
+            obj, _ = decoder.raw_decode(text, start)
+            if isinstance(obj, dict):
+                return obj
+        except json.JSONDecodeError:
+            pass
+        start = text.find("{", start + 1)
+    return None
 
-from io import BytesIO
 
 class Bill_parser:
-    def __init__(self):
+    def __init__(self, client=None, translation_cache=None):
+        self.translation_cache = translation_cache
+        # Reuse a shared client when one is provided
+        if client is not None:
+            self.client = client
+            return
         # Load environment variables
         load_dotenv("/Users/swagatbhowmik/CS projects/CodeJam2024/bill_parser/.env")
         openai.api_key = os.getenv("OPENAI_API_KEY")
@@ -26,7 +79,7 @@ class Bill_parser:
         # Getting the base64 string
         base64_image = encode_image(image_path)
 
-        response = self.client.chat.completions.create(
+        response = metered_call("receipt_parse", self.client.chat.completions.create,
         model="gpt-4o-mini",
         messages=[
             {
@@ -51,20 +104,13 @@ class Bill_parser:
     
 
     def parse_byte(self,image_data):
-        def encode_image_from_bytes(image_data):
-            # Convert bytes to a file-like object
-            image_file = BytesIO(image_data)
-            # Open the image using PIL (Pillow)
-            image = Image.open(image_file)
-            # Save the image to a bytes buffer in a format that preserves quality (e.g., PNG)
-            with BytesIO() as output:
-                image.save(output, format="PNG")  # Save as PNG regardless of input format
-                return base64.b64encode(output.getvalue()).decode('utf-8')
-
-        # Getting the base64 string
-        base64_image = encode_image_from_bytes(image_data)
-        response = self.client.chat.completions.create(
+        # Upright, downscale and re-encode compactly before base64
+        encoded_image, mime_type = prepare_receipt_image(image_data)
+        base64_image = base64.b64encode(encoded_image).decode('utf-8')
+        # Constrain the reply to the Receipt schema instead of free-form JSON
+        response = metered_call("receipt_parse", self.client.beta.chat.completions.parse,
         model="gpt-4o-mini",
+        response_format=Receipt,
         messages=[
             {
             "role": "user",
@@ -76,7 +122,7 @@ class Bill_parser:
                 {
                 "type": "image_url",
                 "image_url": {
-                    "url":  f"data:image/jpeg;base64,{base64_image}"
+                    "url":  f"data:{mime_type};base64,{base64_image}"
                 },
                 },
             ],
@@ -84,60 +130,84 @@ class Bill_parser:
         ],
         )
 
-        return response.choices[0].message.content
+        message = response.choices[0].message
+        if message.refusal:
+            raise ValueError(f"Bill could not be parsed: {message.refusal}")
+        return message.content
     
 
-    def translate(self,json_obj):
+    def translate_item(self, item_name, category):
+        completion = metered_call("translate", self.client.chat.completions.create,
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": f"You are a concise translator translating the item names to English from {category} bills, if it already in english don't translate it"},
+            {"role": "user", "content": f"{item_name}"}
+        ]
+        )
+        return completion.choices[0].message.content
+
+
+    def translate(self,json_obj,max_concurrency=8):
         category=json_obj["bill_category"]
-        count=0
-        for item in json_obj.get('items', []):
-            key=list(item.keys())[0]
-            completion = self.client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": f"You are a concise translator translating the item names to English from {category} bills, if it already in english don't translate it"},
-                {"role": "user", "content": f"{item[key]}"}
-            ]
-            )
-            item[key]=completion.choices[0].message.content
+        items=json_obj.get('items', [])
+        if not items:
+            return json_obj
+
+        keys=[list(item.keys())[0] for item in items]
+        names=[item[key] for item, key in zip(items, keys)]
+
+        # Serve repeated names from the cache; only misses reach the model
+        translations={}
+        for name in names:
+            if name in translations:
+                continue
+            cached=self.translation_cache.get(category, name) if self.translation_cache else None
+            translations[name]=cached
+        misses=[name for name, translation in translations.items() if translation is None]
+
+        def translate_one(item_name):
+            # Keep the original name if this item's translation fails
+            try:
+                translation = self.translate_item(item_name, category)
+            except Exception as e:
+                logger.warning(f"Error translating {item_name}: {str(e)}")
+                return item_name
+            if self.translation_cache:
+                self.translation_cache.set(category, item_name, translation)
+            return translation
+
+        if misses:
+            # Fan out one request per item, bounded by max_concurrency; map keeps item order
+            with ThreadPoolExecutor(max_workers=min(max_concurrency, len(misses))) as executor:
+                translations.update(zip(misses, executor.map(translate_one, misses)))
+        for item, key, name in zip(items, keys, names):
+            item[key]=translations[name]
         return json_obj
     
 
     def jsonify_parse(self,bill_json):
-        def convert_to_json(string):
-            # Step 1: Extract the portion between ``` and ```
-            match = re.search(r"```json(.*?)```", string, re.DOTALL)
-
-            if match:
-                # Step 2: Remove the "json" keyword from the extracted string
-                json_part = match.group(1).strip()
-                try:
-                    # Parse the JSON portion to ensure it's valid
-                    parsed_json = json.loads(json_part)
-                    print("Extracted JSON:", parsed_json)
-                    return parsed_json
-                except json.JSONDecodeError as e:
-                    print(f"Error parsing JSON: {e}")
-                    return None
-            else:
-                return None
-                print("No JSON portion found in the string.")
-
-
-        # Create a deep copy of the original bill to avoid modifying the input
-        copy=json.loads(json.dumps(bill_json))
-        json_copy = convert_to_json(copy)
-    
-    
-        # item names
-        for item in json_copy.get('items', []):
-            # Try to translate, keep original if no translation found
-            print(item)
-            key=list(item.keys())[0]
-            print(item[key])
-
-        
-        return json_copy
+        """
+        Validates the model reply against the Receipt schema. Replies holding JSON inside
+        prose are checked against LooseReceipt, where price_per_unit and people may be missing.
+
+        Args:
+            bill_json (str): Reply from parse or parse_byte
+
+        Returns:
+            dict: The receipt with items, people and bill_category
+
+        Raises:
+            ValueError: If the reply holds no JSON matching the schema
+        """
+        try:
+            return Receipt.model_validate_json(bill_json).model_dump()
+        except ValidationError:
+            pass
+        # Replies without structured output: fenced or bare JSON inside prose
+        extracted = extract_json(bill_json)
+        if extracted is None:
+            raise ValueError("No JSON portion found in the bill reply")
+        return LooseReceipt.model_validate(extracted).model_dump()
 
 
 '''parser=Bill_parser()
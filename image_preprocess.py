@@ -0,0 +1,50 @@
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+MIME_TYPES = {
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+    "PNG": "image/png",
+}
+
+
+def prepare_receipt_image(image_data, max_edge=1600, format="JPEG", quality=80,
+                          grayscale=True, autocontrast=True):
+    """
+    Shrinks a receipt photo before it is sent to the vision model.
+
+    Args:
+        image_data (bytes): The uploaded image
+        max_edge (int): Longest side in pixels after downscaling; smaller images are kept as is
+        format (str): Output encoding, "JPEG", "WEBP" or "PNG"
+        quality (int): Lossy encoder quality
+        grayscale (bool): Drop colour, which receipts rarely need
+        autocontrast (bool): Stretch contrast so faded thermal prints stay legible
+
+    Returns:
+        tuple: (encoded bytes, MIME type)
+    """
+    image = Image.open(BytesIO(image_data))
+    # Let the JPEG decoder skip resolution we are about to throw away
+    image.draft("L" if grayscale else "RGB", (max_edge, max_edge))
+    image = ImageOps.exif_transpose(image)
+
+    if max(image.size) > max_edge:
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+    if grayscale:
+        image = ImageOps.grayscale(image)
+    elif image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    if autocontrast:
+        image = ImageOps.autocontrast(image, cutoff=1)
+
+    with BytesIO() as output:
+        if format == "JPEG":
+            image.save(output, format="JPEG", quality=quality, optimize=True)
+        elif format == "WEBP":
+            image.save(output, format="WEBP", quality=quality, method=4)
+        else:
+            image.save(output, format=format, optimize=True)
+        return output.getvalue(), MIME_TYPES[format]
@@ -0,0 +1,175 @@
+import asyncio
+import datetime
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from urllib.parse import urlsplit
+
+import httpx
+
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class JobStore(ABC):
+    """
+    Where job records live. Subclass to keep them somewhere other than process memory.
+    """
+
+    @abstractmethod
+    def save(self, job):
+        ...
+
+    @abstractmethod
+    def get(self, job_id):
+        ...
+
+
+class InMemoryJobStore(JobStore):
+    def __init__(self, maxsize=10000, ttl=24 * 3600):
+        self.jobs = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def save(self, job):
+        self.jobs.set(job["job_id"], job)
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+
+class JobQueue:
+    def __init__(self, handler, store=None, workers=4, maxsize=100, callback_timeout=10.0,
+                 callback_hosts=(), report_progress=False):
+        """
+        Bounded in-process queue whose workers run handler(**payload) in the background.
+
+        Args:
+            handler: Coroutine function doing the work; its return value becomes the job result
+            store (JobStore): Where job records are kept, in memory by default
+            workers (int): Jobs processed at the same time
+            maxsize (int): Jobs allowed to wait before submit raises asyncio.QueueFull
+            callback_timeout (float): Seconds to wait on a push to a callback URL
+            callback_hosts (iterable): Hosts job results may be pushed to over https; callbacks
+                are refused when empty
+            report_progress (bool): Also pass the handler a progress(**fields) callable that
+                stores its fields under the job's "progress" key
+        """
+        self.handler = handler
+        self.store = store or InMemoryJobStore()
+        self.workers = workers
+        self.maxsize = maxsize
+        self.callback_timeout = callback_timeout
+        self.callback_hosts = {host.strip().lower() for host in callback_hosts if host.strip()}
+        self.report_progress = report_progress
+        self.queue = None
+        self.tasks = []
+        self.running = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.http = None
+
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.maxsize)
+        self.http = httpx.AsyncClient(timeout=self.callback_timeout)
+        self.tasks = [asyncio.create_task(self.work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        if self.http is not None:
+            await self.http.aclose()
+            self.http = None
+
+    def check_callback_url(self, callback_url):
+        """
+        Only lets results go to configured hosts over https, so a caller cannot make the
+        server post to internal addresses.
+
+        Raises:
+            ValueError: If the URL is not https or its host is not allowed
+        """
+        parts = urlsplit(callback_url)
+        if parts.scheme != "https" or parts.username or parts.password:
+            raise ValueError("Callback URL must be a plain https URL")
+        if (parts.hostname or "").lower() not in self.callback_hosts:
+            raise ValueError("Callback host is not allowed")
+
+    def submit(self, payload, callback_url=None):
+        """
+        Queues a job and returns its record without waiting for it to run.
+
+        Raises:
+            ValueError: If callback_url is given but not allowed
+            asyncio.QueueFull: If maxsize jobs are already waiting
+        """
+        if callback_url:
+            self.check_callback_url(callback_url)
+        now = datetime.datetime.utcnow().isoformat()
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "status": "queued",
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        if self.queue.full():
+            raise asyncio.QueueFull()
+        self.store.save(job)
+        self.queue.put_nowait((job["job_id"], payload, callback_url))
+        return job
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def update(self, job_id, **fields):
+        job = dict(self.store.get(job_id) or {"job_id": job_id})
+        job.update(fields, updated_at=datetime.datetime.utcnow().isoformat())
+        self.store.save(job)
+        return job
+
+    def progress_reporter(self, job_id):
+        def progress(**fields):
+            self.update(job_id, progress=fields)
+        return progress
+
+    async def work(self):
+        while True:
+            job_id, payload, callback_url = await self.queue.get()
+            self.running += 1
+            try:
+                self.update(job_id, status="running")
+                try:
+                    if self.report_progress:
+                        payload = {**payload, "progress": self.progress_reporter(job_id)}
+                    result = await self.handler(**payload)
+                    job = self.update(job_id, status="succeeded", result=result)
+                    self.succeeded += 1
+                except Exception as e:
+                    logger.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+                    job = self.update(job_id, status="failed", error=str(e))
+                    self.failed += 1
+                if callback_url:
+                    await self.push(callback_url, job)
+            finally:
+                self.running -= 1
+                self.queue.task_done()
+
+    async def push(self, callback_url, job):
+        try:
+            # Redirects could lead anywhere, so they are not followed
+            await self.http.post(callback_url, json=job, follow_redirects=False)
+        except Exception as e:
+            logger.warning(f"Callback for job {job['job_id']} failed: {str(e)}")
+
+    def stats(self):
+        return {
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "running": self.running,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "workers": self.workers,
+            "maxsize": self.maxsize,
+        }
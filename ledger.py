@@ -0,0 +1,60 @@
+"""
+Rebuild or verify the Group_Balances ledger against the raw Splits and Payment_Transactions rows.
+
+    python ledger.py verify [group_id ...]
+    python ledger.py rebuild [group_id ...]
+
+With no group ids every group is processed. The ledger functions are not callable
+with the anon key, so SUPABASE_SERVICE_ROLE_KEY must be set.
+"""
+import asyncio
+import os
+import sys
+
+from config import supabase_url
+from db import Database
+
+db = Database(supabase_url, os.getenv("SUPABASE_SERVICE_ROLE_KEY"))
+
+
+async def verify(group_ids):
+    """
+    Prints every ledger row that disagrees with the raw rows. Returns the number of mismatches.
+    """
+    mismatches = []
+    for group_id in group_ids:
+        response = await db.rpc("verify_group_balances", {"p_group_id": group_id}).execute()
+        mismatches.extend(response.data)
+    for row in mismatches:
+        print(f"Mismatch in group {row['group_id']} for user {row['user_id']}: "
+              f"ledger {row['ledger']}, expected {row['expected']}")
+    print(f"{len(mismatches)} mismatched ledger row(s)")
+    return len(mismatches)
+
+
+async def rebuild(group_ids):
+    for group_id in group_ids:
+        response = await db.rpc("rebuild_group_balances", {"p_group_id": group_id}).execute()
+        print(f"Rebuilt {'all groups' if group_id is None else 'group ' + group_id}: {response.data} row(s)")
+
+
+async def main(argv):
+    if len(argv) < 2 or argv[1] not in ("verify", "rebuild"):
+        print(__doc__)
+        return 2
+    if not os.getenv("SUPABASE_SERVICE_ROLE_KEY"):
+        print("SUPABASE_SERVICE_ROLE_KEY is not set")
+        return 2
+    # None asks the database functions for every group at once
+    group_ids = argv[2:] or [None]
+    try:
+        if argv[1] == "rebuild":
+            await rebuild(group_ids)
+            return 0
+        return 1 if await verify(group_ids) else 0
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv)))
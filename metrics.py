@@ -0,0 +1,227 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Registry:
+    """
+    Every metric of the process, rendered together in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        f'{name}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, help, labelnames=(), registry=REGISTRY):
+        """
+        Base for labelled metrics. Values are kept per tuple of label values.
+
+        Args:
+            name (str): Metric name
+            help (str): One-line description
+            labelnames (tuple): Label names, passed as keyword arguments when recording
+            registry (Registry): Where the metric is rendered from
+        """
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+        registry.register(self)
+
+    def key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self):
+        with self.lock:
+            return sorted((key, value if not isinstance(value, list) else list(value))
+                          for key, value in self.values.items())
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        return [
+            f"{self.name}{format_labels(zip(self.labelnames, key))} {value}"
+            for key, value in self.snapshot()
+        ]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help, labelnames, registry)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                # One count per bucket plus +Inf, then the sum
+                entry = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            entry[index] += 1
+            entry[-1] += value
+
+    def samples(self):
+        lines = []
+        for key, entry in self.snapshot():
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), entry[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{format_labels(labels + [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {entry[-1]}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {cumulative}")
+        return lines
+
+
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests currently being handled", ("method",)
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Request latency by route template", ("route", "method", "status")
+)
+SUPABASE_REQUEST_DURATION = Histogram(
+    "supabase_request_duration_seconds", "PostgREST call latency by table or rpc", ("table", "method")
+)
+SUPABASE_REQUEST_ERRORS = Counter(
+    "supabase_request_errors_total", "PostgREST calls that failed or returned an error status", ("table", "method")
+)
+OPENAI_REQUEST_DURATION = Histogram(
+    "openai_request_duration_seconds", "OpenAI call latency by model and operation", ("model", "operation")
+)
+OPENAI_REQUEST_ERRORS = Counter(
+    "openai_request_errors_total", "OpenAI calls that raised", ("model", "operation")
+)
+OPENAI_TOKENS = Counter(
+    "openai_tokens_total", "Tokens used by OpenAI calls", ("model", "operation", "type")
+)
+
+
+class OpenAICall:
+    def __init__(self, model, operation):
+        self.model = model
+        self.operation = operation
+
+    def record_usage(self, usage):
+        """
+        Adds a response's token usage, if it reports any.
+        """
+        if usage is None:
+            return
+        OPENAI_TOKENS.inc(usage.prompt_tokens or 0, model=self.model, operation=self.operation, type="prompt")
+        OPENAI_TOKENS.inc(usage.completion_tokens or 0, model=self.model, operation=self.operation, type="completion")
+
+
+@contextmanager
+def openai_call(model, operation):
+    """
+    Times an OpenAI call and counts it as an error if it raises.
+
+        with openai_call("gpt-4o", "translate") as call:
+            completion = client.chat.completions.create(...)
+            call.record_usage(completion.usage)
+    """
+    call = OpenAICall(model, operation)
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        OPENAI_REQUEST_ERRORS.inc(model=model, operation=operation)
+        raise
+    finally:
+        OPENAI_REQUEST_DURATION.observe(time.perf_counter() - start, model=model, operation=operation)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        """
+        Pure ASGI middleware recording in-flight requests and latency per route template.
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc(method=method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec(method=method)
+            # The router stores the matched route in the scope; the template keeps ids out of labels
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, route=route, method=method, status=status[0])
+
+
+def metered_call(operation, fn, **kwargs):
+    """
+    Calls an OpenAI client method, labelled with operation and the model it is asked for,
+    recording latency, errors and the token usage the response reports.
+    """
+    model = kwargs.get("model", "none")
+    with openai_call(model, operation) as call:
+        response = fn(**kwargs)
+        call.record_usage(getattr(response, "usage", None))
+    return response
+
+
+def render():
+    return REGISTRY.render()
@@ -0,0 +1,145 @@
+import copy
+import hashlib
+from io import BytesIO
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from cache import TTLCache
+
+
+class ReceiptCache:
+    def __init__(self, maxsize=512, ttl=7 * 24 * 3600, perceptual=False, max_changed_pixels=0.003,
+                 pixel_tolerance=32, max_aspect_difference=0.02, duplicate_window=600,
+                 enabled_by_default=True):
+        """
+        Content-addressed cache of parsed receipts so re-uploads skip the vision model.
+
+        Args:
+            maxsize (int): Parsed receipts held in memory
+            ttl (float): Seconds a parsed receipt stays valid
+            perceptual (bool): Also match re-encoded copies of a photo already uploaded to the
+                same group by thumbnail; off by default since distinct receipts can look alike
+            max_changed_pixels (float): Largest fraction of thumbnail pixels that may differ
+                for two uploads to count as the same photo
+            pixel_tolerance (int): Grayscale difference below which a pixel counts as unchanged
+            max_aspect_difference (float): Largest relative aspect-ratio difference treated as
+                the same photo
+            duplicate_window (float): Seconds an identical upload to the same group returns the
+                already-saved bill instead of inserting a new one
+            enabled_by_default (bool): Whether groups without an explicit setting use the cache
+        """
+        self.perceptual = perceptual
+        self.max_changed_pixels = max_changed_pixels
+        self.pixel_tolerance = pixel_tolerance
+        self.max_aspect_difference = max_aspect_difference
+        self.enabled_by_default = enabled_by_default
+        self.group_settings = {}
+        self.receipts = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.recent_bills = TTLCache(maxsize=maxsize, ttl=duplicate_window)
+        self.exact_hits = 0
+        self.perceptual_hits = 0
+        self.duplicate_hits = 0
+        self.misses = 0
+
+    def is_enabled(self, group_id):
+        return self.group_settings.get(group_id, self.enabled_by_default)
+
+    def configure_group(self, group_id, enabled):
+        self.group_settings[group_id] = enabled
+
+    @staticmethod
+    def digest(image_data):
+        return hashlib.sha256(image_data).hexdigest()
+
+    @staticmethod
+    def perceptual_hash(image_data, size=(128, 256)):
+        """
+        (aspect ratio, grayscale thumbnail) of the photo, stable across re-encoding and
+        resizing. Receipts are mostly blank paper, so compact hashes such as dHash put
+        different receipts within a few bits of each other; the thumbnail keeps enough
+        detail to tell their lines apart.
+        """
+        try:
+            image = Image.open(BytesIO(image_data))
+            width, height = image.size
+            image = ImageOps.autocontrast(image.convert("L")).resize(size, Image.BOX)
+        except Exception:
+            return None
+        return width / height, np.frombuffer(image.tobytes(), dtype=np.uint8)
+
+    def same_photo(self, phash, other):
+        if other is None:
+            return False
+        (aspect, pixels), (other_aspect, other_pixels) = phash, other
+        if abs(aspect - other_aspect) > self.max_aspect_difference * max(aspect, other_aspect):
+            return False
+        changed = np.abs(pixels.astype(np.int16) - other_pixels.astype(np.int16)) > self.pixel_tolerance
+        return changed.mean() <= self.max_changed_pixels
+
+    def recent_bill(self, group_id, digest):
+        """
+        Returns the saved response for an identical upload to this group within the window.
+        """
+        if not self.is_enabled(group_id):
+            return None
+        result = self.recent_bills.get((group_id, digest))
+        if result is not None:
+            self.duplicate_hits += 1
+            return copy.deepcopy(result)
+        return None
+
+    def lookup(self, group_id, image_data, digest):
+        """
+        Returns (parsed receipt or None, perceptual hash) for the upload. Identical bytes
+        match from any group; near-identical photos only match within the same group.
+        """
+        if not self.is_enabled(group_id):
+            return None, None
+        entry = self.receipts.get(digest)
+        if entry is not None:
+            self.exact_hits += 1
+            return copy.deepcopy(entry[2]), entry[1]
+
+        phash = self.perceptual_hash(image_data) if self.perceptual else None
+        if phash is not None:
+            for _, (other_group, other, parsed) in self.receipts.items():
+                if other_group == group_id and self.same_photo(phash, other):
+                    self.perceptual_hits += 1
+                    return copy.deepcopy(parsed), phash
+        self.misses += 1
+        return None, phash
+
+    def store(self, group_id, digest, phash, parsed):
+        if self.is_enabled(group_id):
+            self.receipts.set(digest, (group_id, phash, copy.deepcopy(parsed)))
+
+    def remember_bill(self, group_id, digest, result):
+        if self.is_enabled(group_id):
+            self.recent_bills.set((group_id, digest), copy.deepcopy(result))
+
+    def forget_bill(self, bill_id):
+        """
+        Drops the duplicate-upload entry for a deleted bill.
+        """
+        for key, result in self.recent_bills.items():
+            if str(result.get("bill_id")) == str(bill_id):
+                self.recent_bills.pop(key)
+
+    def forget_group(self, group_id):
+        for key, _ in self.recent_bills.items():
+            if key[0] == group_id:
+                self.recent_bills.pop(key)
+        self.group_settings.pop(group_id, None)
+
+    def stats(self):
+        hits = self.exact_hits + self.perceptual_hits
+        lookups = hits + self.misses
+        return {
+            "exact_hits": self.exact_hits,
+            "perceptual_hits": self.perceptual_hits,
+            "duplicate_uploads": self.duplicate_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "size": len(self.receipts),
+        }
@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import uuid
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from cache import TTLCache
+
+
+class ResponseCache:
+    def __init__(self, maxsize=2048, ttl=30, single_flight=None):
+        """
+        ETags and serialized bodies for polled read endpoints.
+
+        An ETag is derived from the request path and query plus the change counters of
+        the scopes the response depends on, such as ("group", group_id) or ("user", user_id).
+        Write endpoints bump those counters, so a matching If-None-Match can be answered
+        with 304 without touching the database. Tags also roll over every ttl seconds,
+        which bounds staleness from rows written outside this API.
+
+        Args:
+            maxsize (int): Serialized bodies kept in memory
+            ttl (float): Seconds a tag and its body stay valid without any bump
+            single_flight (SingleFlight): Shares one build among concurrent misses on the same tag
+        """
+        self.bodies = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.ttl = ttl
+        self.single_flight = single_flight
+        # Counters restart with the process; the epoch keeps old tags from matching new ones
+        self.epoch = uuid.uuid4().hex
+        self.generation = 0
+        self.versions = {}
+        self.lock = threading.Lock()
+        self.not_modified = 0
+
+    def bump(self, scope, key):
+        """
+        Marks every response depending on (scope, key) as changed.
+        """
+        if key is None:
+            return
+        with self.lock:
+            self.versions[(scope, str(key))] = self.versions.get((scope, str(key)), 0) + 1
+
+    def invalidate_all(self):
+        """
+        Marks every response as changed, for writes whose reach is too wide to track.
+        """
+        with self.lock:
+            self.generation += 1
+
+    def etag(self, request_key, scopes):
+        with self.lock:
+            versions = [self.versions.get((scope, str(key)), 0) for scope, key in scopes]
+            generation = self.generation
+        window = int(time.time() // self.ttl)
+        raw = json.dumps([self.epoch, generation, window, request_key, versions])
+        return f'W/"{hashlib.sha256(raw.encode()).hexdigest()[:32]}"'
+
+    async def respond(self, request, scopes, build, timeout=None):
+        """
+        Answers a GET from its ETag: 304 when the client's copy is current, the cached
+        body when another client already fetched it, otherwise build() is awaited and
+        its body cached. Only "success" payloads are cached. Concurrent misses on the same
+        tag share one build when a single_flight is set.
+
+        Args:
+            request (Request): Incoming request
+            scopes (list): (scope, key) pairs the response depends on
+            build: Coroutine function returning the response payload
+            timeout (float): Seconds to wait on a shared build, overriding the single_flight
+                default for this route
+
+        Returns:
+            Response: 304, cached or freshly built JSON response
+        """
+        request_key = f"{request.url.path}?{request.url.query}"
+        # Taken before building, so a write that lands meanwhile moves later polls to a new tag
+        etag = self.etag(request_key, scopes)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in (tag.strip() for tag in if_none_match.split(",")):
+            with self.lock:
+                self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        body = self.bodies.get(etag)
+        if body is None:
+            try:
+                if self.single_flight is not None:
+                    content = await self.single_flight.run(etag, build, timeout=timeout)
+                else:
+                    content = await build()
+            except asyncio.TimeoutError:
+                return JSONResponse(
+                    content={"status": "error", "message": "Timed out waiting for the data"},
+                    status_code=504,
+                )
+            if isinstance(content, Response):
+                return content
+            if not isinstance(content, dict) or content.get("status") != "success":
+                return JSONResponse(content=jsonable_encoder(content))
+            body = json.dumps(jsonable_encoder(content)).encode()
+            self.bodies.set(etag, body)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def stats(self):
+        with self.lock:
+            not_modified = self.not_modified
+        return {"not_modified": not_modified, "bodies": self.bodies.stats()}
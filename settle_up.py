@@ -0,0 +1,71 @@
+import heapq
+
+
+def to_net_cents(balances):
+    """
+    Converts owe/lent balances into net integer cents that sum to exactly zero.
+
+    Args:
+        balances (dict): user_id -> {"owe": float, "lent": float}
+
+    Returns:
+        dict: user_id -> net cents, positive when the user is owed money
+
+    Raises:
+        ValueError: If the balances are off by more than rounding can explain
+    """
+    net = {
+        user_id: round(balance["lent"] * 100) - round(balance["owe"] * 100)
+        for user_id, balance in balances.items()
+    }
+    net = {user_id: cents for user_id, cents in net.items() if cents}
+    residual = sum(net.values())
+    if abs(residual) > len(net):
+        raise ValueError(f"Group balances do not net to zero (off by {residual} cents)")
+    if residual:
+        # Per-split rounding leaves a few stray cents; settle them with the largest balance
+        largest = max(sorted(net), key=lambda user_id: abs(net[user_id]))
+        net[largest] -= residual
+    return net
+
+
+def settle_up(net_cents):
+    """
+    Turns net balances into a short list of transfers that settles everyone.
+
+    Greedy on two heaps: the largest debtor pays the largest creditor as much as
+    possible, and whoever is left with a remainder goes back on its heap. Each
+    transfer settles at least one user, so there are at most n - 1 transfers and
+    the whole plan takes O(n log n).
+
+    Args:
+        net_cents (dict): user_id -> net integer cents, positive when owed money;
+            must sum to zero
+
+    Returns:
+        list: (payer_id, payee_id, cents) transfers
+
+    Raises:
+        ValueError: If the balances do not sum to zero
+    """
+    if sum(net_cents.values()) != 0:
+        raise ValueError("Net balances must sum to zero")
+
+    # Ties break on user id so the same balances always produce the same plan
+    creditors = [(-cents, user_id) for user_id, cents in net_cents.items() if cents > 0]
+    debtors = [(cents, user_id) for user_id, cents in net_cents.items() if cents < 0]
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+
+    transfers = []
+    while creditors and debtors:
+        credit, payee_id = heapq.heappop(creditors)
+        debt, payer_id = heapq.heappop(debtors)
+        credit, debt = -credit, -debt
+        amount = min(credit, debt)
+        transfers.append((payer_id, payee_id, amount))
+        if credit > amount:
+            heapq.heappush(creditors, (amount - credit, payee_id))
+        if debt > amount:
+            heapq.heappush(debtors, (amount - debt, payer_id))
+    return transfers
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    def __init__(self, timeout=10.0):
+        """
+        Coalesces identical concurrent calls: callers with the same key while a call is
+        in flight wait on that call instead of starting their own, and all of them get
+        its result or its exception.
+
+        Args:
+            timeout (float): Default seconds a caller waits before giving up; the shared
+                call itself keeps running for the other callers
+        """
+        self.timeout = timeout
+        self.in_flight = {}
+        self.calls = 0
+        self.absorbed = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    async def run(self, key, fn, timeout=None):
+        """
+        Awaits fn() once per key at a time and shares the outcome with every caller.
+
+        Args:
+            key: Logical key identifying identical calls
+            fn: Coroutine function doing the work
+            timeout (float): Seconds this caller waits, overriding the default
+
+        Returns:
+            The value fn() returned
+
+        Raises:
+            asyncio.TimeoutError: If the shared call does not finish in time
+            Exception: Whatever fn() raised
+        """
+        task = self.in_flight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda done: self.finish(key, done))
+        else:
+            self.absorbed += 1
+
+        try:
+            # Shielded so one caller timing out does not cancel the call for the others
+            return await asyncio.wait_for(asyncio.shield(task), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f"Timed out waiting on in-flight call for {key}")
+            raise
+
+    def finish(self, key, task):
+        if self.in_flight.get(key) is task:
+            del self.in_flight[key]
+        # Retrieve the exception so it is not reported as never retrieved
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def stats(self):
+        total = self.calls + self.absorbed
+        return {
+            "calls": self.calls,
+            "absorbed": self.absorbed,
+            "absorbed_rate": self.absorbed / total if total else 0.0,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "in_flight": len(self.in_flight),
+        }
@@ -0,0 +1,211 @@
+-- Running per-(group, user) totals behind /group-expense, kept in step with
+-- Splits and Payment_Transactions by triggers. Ids are stored as text so the
+-- ledger works whatever type the source tables use.
+
+create table if not exists public."Group_Balances" (
+    group_id text not null,
+    user_id text not null,
+    amount_due numeric not null default 0,
+    amount_paid numeric not null default 0,
+    payments_made numeric not null default 0,
+    payments_received numeric not null default 0,
+    split_count integer not null default 0,
+    updated_at timestamptz not null default now(),
+    primary key (group_id, user_id)
+);
+
+create index if not exists group_balances_user_id_idx on public."Group_Balances" (user_id);
+
+create or replace function public.apply_group_balance(
+    p_group_id text,
+    p_user_id text,
+    p_amount_due numeric,
+    p_amount_paid numeric,
+    p_payments_made numeric,
+    p_payments_received numeric,
+    p_split_count integer
+) returns void
+language sql
+security definer
+set search_path = public
+as $$
+    insert into public."Group_Balances" as b (
+        group_id, user_id, amount_due, amount_paid, payments_made, payments_received, split_count
+    ) values (
+        p_group_id, p_user_id, p_amount_due, p_amount_paid, p_payments_made, p_payments_received, p_split_count
+    )
+    on conflict (group_id, user_id) do update set
+        amount_due = b.amount_due + excluded.amount_due,
+        amount_paid = b.amount_paid + excluded.amount_paid,
+        payments_made = b.payments_made + excluded.payments_made,
+        payments_received = b.payments_received + excluded.payments_received,
+        split_count = b.split_count + excluded.split_count,
+        updated_at = now();
+$$;
+
+create or replace function public.group_balances_on_split() returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_group_id text;
+begin
+    if tg_op in ('DELETE', 'UPDATE') then
+        select group_id::text into v_group_id from public."Bills" where bill_id = old.bill_id;
+        if v_group_id is not null then
+            perform public.apply_group_balance(
+                v_group_id, old.user_id::text,
+                -coalesce(old.amount_due, 0), -coalesce(old.amount_paid, 0), 0, 0, -1
+            );
+        end if;
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        select group_id::text into v_group_id from public."Bills" where bill_id = new.bill_id;
+        if v_group_id is not null then
+            perform public.apply_group_balance(
+                v_group_id, new.user_id::text,
+                coalesce(new.amount_due, 0), coalesce(new.amount_paid, 0), 0, 0, 1
+            );
+        end if;
+    end if;
+    return null;
+end;
+$$;
+
+create or replace function public.group_balances_on_payment() returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    if tg_op in ('DELETE', 'UPDATE') then
+        perform public.apply_group_balance(old.group_id::text, old.payer_id::text, 0, 0, -coalesce(old.amount, 0), 0, 0);
+        perform public.apply_group_balance(old.group_id::text, old.payee_id::text, 0, 0, 0, -coalesce(old.amount, 0), 0);
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        perform public.apply_group_balance(new.group_id::text, new.payer_id::text, 0, 0, coalesce(new.amount, 0), 0, 0);
+        perform public.apply_group_balance(new.group_id::text, new.payee_id::text, 0, 0, 0, coalesce(new.amount, 0), 0);
+    end if;
+    return null;
+end;
+$$;
+
+create or replace function public.group_balances_on_group_delete() returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    delete from public."Group_Balances" where group_id = old.group_id::text;
+    return null;
+end;
+$$;
+
+drop trigger if exists group_balances_splits on public."Splits";
+create trigger group_balances_splits
+    after insert or update or delete on public."Splits"
+    for each row execute function public.group_balances_on_split();
+
+drop trigger if exists group_balances_payments on public."Payment_Transactions";
+create trigger group_balances_payments
+    after insert or update or delete on public."Payment_Transactions"
+    for each row execute function public.group_balances_on_payment();
+
+drop trigger if exists group_balances_groups on public."Groups";
+create trigger group_balances_groups
+    after delete on public."Groups"
+    for each row execute function public.group_balances_on_group_delete();
+
+-- Ledger rows as they should be, recomputed from raw rows for one group or
+-- (p_group_id null) all of them.
+create or replace function public.raw_group_balances(p_group_id text default null)
+returns table (
+    group_id text,
+    user_id text,
+    amount_due numeric,
+    amount_paid numeric,
+    payments_made numeric,
+    payments_received numeric,
+    split_count integer
+)
+language sql
+stable
+security definer
+set search_path = public
+as $$
+    select raw.group_id, raw.user_id, sum(raw.amount_due), sum(raw.amount_paid),
+           sum(raw.payments_made), sum(raw.payments_received), sum(raw.split_count)::integer
+    from (
+        select b.group_id::text as group_id, s.user_id::text as user_id,
+               coalesce(s.amount_due, 0) as amount_due, coalesce(s.amount_paid, 0) as amount_paid,
+               0 as payments_made, 0 as payments_received, 1 as split_count
+        from public."Splits" s
+        join public."Bills" b on b.bill_id = s.bill_id
+        where p_group_id is null or b.group_id::text = p_group_id
+        union all
+        select p.group_id::text, p.payer_id::text, 0, 0, coalesce(p.amount, 0), 0, 0
+        from public."Payment_Transactions" p
+        where p_group_id is null or p.group_id::text = p_group_id
+        union all
+        select p.group_id::text, p.payee_id::text, 0, 0, 0, coalesce(p.amount, 0), 0
+        from public."Payment_Transactions" p
+        where p_group_id is null or p.group_id::text = p_group_id
+    ) raw
+    group by raw.group_id, raw.user_id;
+$$;
+
+create or replace function public.rebuild_group_balances(p_group_id text default null)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_rows integer;
+begin
+    delete from public."Group_Balances" b where p_group_id is null or b.group_id = p_group_id;
+
+    insert into public."Group_Balances" (
+        group_id, user_id, amount_due, amount_paid, payments_made, payments_received, split_count
+    )
+    select * from public.raw_group_balances(p_group_id);
+
+    get diagnostics v_rows = row_count;
+    return v_rows;
+end;
+$$;
+
+-- Ledger rows that disagree with the raw rows; empty when the ledger is correct.
+create or replace function public.verify_group_balances(p_group_id text default null)
+returns table (
+    group_id text,
+    user_id text,
+    ledger jsonb,
+    expected jsonb
+)
+language sql
+stable
+security definer
+set search_path = public
+as $$
+    with ledger as (
+        select * from public."Group_Balances" b
+        where p_group_id is null or b.group_id = p_group_id
+    ),
+    expected as (
+        select * from public.raw_group_balances(p_group_id)
+    )
+    select coalesce(l.group_id, e.group_id), coalesce(l.user_id, e.user_id),
+           to_jsonb(l) - 'group_id' - 'user_id' - 'updated_at',
+           to_jsonb(e) - 'group_id' - 'user_id'
+    from ledger l
+    full join expected e on e.group_id = l.group_id and e.user_id = l.user_id
+    where coalesce(l.amount_due, 0) <> coalesce(e.amount_due, 0)
+       or coalesce(l.amount_paid, 0) <> coalesce(e.amount_paid, 0)
+       or coalesce(l.payments_made, 0) <> coalesce(e.payments_made, 0)
+       or coalesce(l.payments_received, 0) <> coalesce(e.payments_received, 0)
+       or coalesce(l.split_count, 0) <> coalesce(e.split_count, 0);
+$$;
+
+select public.rebuild_group_balances();
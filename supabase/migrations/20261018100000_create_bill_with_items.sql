@@ -0,0 +1,33 @@
+-- Persists a scanned bill and all of its items in one call and one transaction,
+-- returning the generated ids with item ids in the same order as p_items.
+-- Rows are built with jsonb_populate_record so the function follows whatever
+-- column types Bills and Bill_Items use.
+
+create or replace function public.create_bill_with_items(p_bill jsonb, p_items jsonb)
+returns jsonb
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_bill public."Bills";
+    v_item jsonb;
+    v_item_id public."Bill_Items".item_id%type;
+    v_item_ids jsonb := '[]'::jsonb;
+begin
+    insert into public."Bills" (group_id, uploaded_by, total_amount)
+    select r.group_id, r.uploaded_by, r.total_amount
+    from jsonb_populate_record(null::public."Bills", p_bill) r
+    returning * into v_bill;
+
+    for v_item in select value from jsonb_array_elements(coalesce(p_items, '[]'::jsonb)) with ordinality order by ordinality loop
+        insert into public."Bill_Items" (bill_id, item_name, quantity, total_price)
+        select v_bill.bill_id, r.item_name, r.quantity, r.total_price
+        from jsonb_populate_record(null::public."Bill_Items", v_item) r
+        returning item_id into v_item_id;
+        v_item_ids := v_item_ids || to_jsonb(v_item_id);
+    end loop;
+
+    return jsonb_build_object('bill_id', v_bill.bill_id, 'item_ids', v_item_ids);
+end;
+$$;
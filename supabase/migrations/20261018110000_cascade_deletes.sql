@@ -0,0 +1,105 @@
+-- Cascade deletes for /delete-bill and /delete-group, each in one call and one
+-- transaction. Groups with more bills than p_max_bills are left alone and
+-- reported as too_large; delete_group_batch then removes them a batch of bills
+-- per call so a background job can report progress.
+
+create or replace function public.delete_bill_cascade(p_bill_id public."Bills".bill_id%type)
+returns jsonb
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_items integer;
+    v_splits integer;
+begin
+    perform 1 from public."Bills" where bill_id = p_bill_id for update;
+    if not found then
+        return jsonb_build_object('status', 'not_found');
+    end if;
+
+    delete from public."Bill_Items" where bill_id = p_bill_id;
+    get diagnostics v_items = row_count;
+    delete from public."Splits" where bill_id = p_bill_id;
+    get diagnostics v_splits = row_count;
+    delete from public."Bills" where bill_id = p_bill_id;
+
+    return jsonb_build_object('status', 'deleted', 'bill_items', v_items, 'splits', v_splits);
+end;
+$$;
+
+-- Deletes up to p_batch_size of the group's bills with their items and splits.
+-- Once no bills are left the group's payments, members and the group itself go
+-- too. Safe to call again after a failure.
+create or replace function public.delete_group_batch(
+    p_group_id public."Groups".group_id%type,
+    p_batch_size integer default null
+) returns jsonb
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_deleted integer;
+    v_remaining integer;
+begin
+    -- The same ordered batch is selected for each statement; splits go before
+    -- their bills so the ledger triggers can still resolve the group.
+    delete from public."Bill_Items" where bill_id in (
+        select bill_id from public."Bills" where group_id = p_group_id order by bill_id limit p_batch_size
+    );
+    delete from public."Splits" where bill_id in (
+        select bill_id from public."Bills" where group_id = p_group_id order by bill_id limit p_batch_size
+    );
+    delete from public."Bills" where bill_id in (
+        select bill_id from public."Bills" where group_id = p_group_id order by bill_id limit p_batch_size
+    );
+    get diagnostics v_deleted = row_count;
+
+    select count(*) into v_remaining from public."Bills" where group_id = p_group_id;
+    if v_remaining = 0 then
+        delete from public."Payment_Transactions" where group_id = p_group_id;
+        delete from public."Group_Members" where group_id = p_group_id;
+        delete from public."Groups" where group_id = p_group_id;
+    end if;
+
+    return jsonb_build_object(
+        'bills_deleted', v_deleted,
+        'bills_remaining', v_remaining,
+        'done', v_remaining = 0
+    );
+end;
+$$;
+
+create or replace function public.delete_group_cascade(
+    p_group_id public."Groups".group_id%type,
+    p_user_id text,
+    p_max_bills integer default null
+) returns jsonb
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_created_by text;
+    v_bills integer;
+begin
+    select created_by::text into v_created_by
+    from public."Groups" where group_id = p_group_id
+    for update;
+    if not found then
+        return jsonb_build_object('status', 'not_found');
+    end if;
+    if v_created_by is distinct from p_user_id then
+        return jsonb_build_object('status', 'forbidden');
+    end if;
+
+    select count(*) into v_bills from public."Bills" where group_id = p_group_id;
+    if p_max_bills is not null and v_bills > p_max_bills then
+        return jsonb_build_object('status', 'too_large', 'bills', v_bills);
+    end if;
+
+    perform public.delete_group_batch(p_group_id, null);
+    return jsonb_build_object('status', 'deleted', 'bills', v_bills);
+end;
+$$;
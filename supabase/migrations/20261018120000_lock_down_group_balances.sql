@@ -0,0 +1,36 @@
+-- Group_Balances is only written by the triggers on Splits, Payment_Transactions
+-- and Groups, which keep running as the function owner. Everything else that can
+-- touch the ledger is kept away from API clients:
+--  * apply_group_balance, raw_group_balances, rebuild_group_balances and
+--    verify_group_balances are not callable over PostgREST by anon or
+--    authenticated; ledger.py calls them with the service-role key.
+--  * Row level security is on, with a read-only policy for the rows the API
+--    serves from /group-expense and /user-total-expense.
+
+revoke execute on function public.apply_group_balance(text, text, numeric, numeric, numeric, numeric, integer)
+    from public, anon, authenticated;
+revoke execute on function public.raw_group_balances(text) from public, anon, authenticated;
+revoke execute on function public.rebuild_group_balances(text) from public, anon, authenticated;
+revoke execute on function public.verify_group_balances(text) from public, anon, authenticated;
+
+grant execute on function public.apply_group_balance(text, text, numeric, numeric, numeric, numeric, integer)
+    to service_role;
+grant execute on function public.raw_group_balances(text) to service_role;
+grant execute on function public.rebuild_group_balances(text) to service_role;
+grant execute on function public.verify_group_balances(text) to service_role;
+
+-- Trigger functions are never called directly
+revoke execute on function public.group_balances_on_split() from public, anon, authenticated;
+revoke execute on function public.group_balances_on_payment() from public, anon, authenticated;
+revoke execute on function public.group_balances_on_group_delete() from public, anon, authenticated;
+
+alter table public."Group_Balances" enable row level security;
+
+revoke insert, update, delete, truncate on public."Group_Balances" from anon, authenticated;
+
+drop policy if exists "Group balances are readable" on public."Group_Balances";
+create policy "Group balances are readable"
+    on public."Group_Balances"
+    for select
+    to anon, authenticated
+    using (true);
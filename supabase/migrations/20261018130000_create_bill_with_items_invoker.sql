@@ -0,0 +1,6 @@
+-- create_bill_with_items ran as its owner, which let any caller with the anon key
+-- insert bills and items into any group regardless of row level security. As
+-- invoker it writes with the caller's own privileges and policies, the same as
+-- the separate inserts it replaced.
+
+alter function public.create_bill_with_items(jsonb, jsonb) security invoker;
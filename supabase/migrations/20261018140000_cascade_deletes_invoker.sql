@@ -0,0 +1,60 @@
+-- The cascade deletes ran as their owner, so anyone with the anon key could call
+-- delete_group_batch or delete_bill_cascade over RPC and wipe any group or bill
+-- past row level security. As invoker they delete with the caller's own
+-- privileges and policies, the same as the row-by-row deletes they replaced.
+-- The Group_Balances triggers they fire keep their own definer rights.
+
+-- delete_group_batch picked its batch once per statement, so a bill inserted in
+-- between could shift the batch and a bill could go before its items. The batch
+-- is now picked once; the ids travel as jsonb and come back typed as the column
+-- through jsonb_populate_recordset, whatever type bill_id has.
+create or replace function public.delete_group_batch(
+    p_group_id public."Groups".group_id%type,
+    p_batch_size integer default null
+) returns jsonb
+language plpgsql
+security invoker
+set search_path = public
+as $$
+declare
+    v_batch jsonb;
+    v_deleted integer;
+    v_remaining integer;
+begin
+    select coalesce(jsonb_agg(jsonb_build_object('bill_id', batch.bill_id)), '[]'::jsonb) into v_batch
+    from (
+        select bill_id from public."Bills" where group_id = p_group_id
+        order by bill_id limit p_batch_size
+        for update
+    ) batch;
+
+    -- Splits go before their bills so the ledger triggers can still resolve the group
+    delete from public."Bill_Items" where bill_id in (
+        select bill_id from jsonb_populate_recordset(null::public."Bills", v_batch)
+    );
+    delete from public."Splits" where bill_id in (
+        select bill_id from jsonb_populate_recordset(null::public."Bills", v_batch)
+    );
+    delete from public."Bills" where bill_id in (
+        select bill_id from jsonb_populate_recordset(null::public."Bills", v_batch)
+    );
+    get diagnostics v_deleted = row_count;
+
+    select count(*) into v_remaining from public."Bills" where group_id = p_group_id;
+    if v_remaining = 0 then
+        delete from public."Payment_Transactions" where group_id = p_group_id;
+        delete from public."Group_Members" where group_id = p_group_id;
+        delete from public."Groups" where group_id = p_group_id;
+    end if;
+
+    return jsonb_build_object(
+        'bills_deleted', v_deleted,
+        'bills_remaining', v_remaining,
+        'done', v_remaining = 0
+    );
+end;
+$$;
+
+-- Each name is unique, so no argument list: the id types come from the tables
+alter function public.delete_bill_cascade security invoker;
+alter function public.delete_group_cascade security invoker;
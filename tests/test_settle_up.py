@@ -0,0 +1,112 @@
+import random
+
+import pytest
+
+from settle_up import settle_up, to_net_cents
+
+
+def apply(net_cents, transfers):
+    remaining = dict(net_cents)
+    for payer_id, payee_id, cents in transfers:
+        remaining[payer_id] += cents
+        remaining[payee_id] -= cents
+    return remaining
+
+
+def random_balances(rng, users):
+    net = {f"user-{i:04d}": rng.randint(-50000, 50000) for i in range(users - 1)}
+    net[f"user-{users - 1:04d}"] = -sum(net.values())
+    return net
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_transfers_settle_everyone(seed):
+    rng = random.Random(seed)
+    net = random_balances(rng, rng.randint(2, 60))
+
+    transfers = settle_up(net)
+
+    assert all(cents > 0 for _, _, cents in transfers)
+    assert all(cents == 0 for cents in apply(net, transfers).values())
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_at_most_n_minus_one_transfers(seed):
+    rng = random.Random(seed)
+    net = random_balances(rng, rng.randint(2, 60))
+
+    transfers = settle_up(net)
+
+    involved = [cents for cents in net.values() if cents]
+    assert len(transfers) <= max(len(involved) - 1, 0)
+
+
+def test_no_transfers_when_settled():
+    assert settle_up({}) == []
+    assert settle_up({"a": 0, "b": 0}) == []
+
+
+def test_rejects_balances_not_summing_to_zero():
+    with pytest.raises(ValueError):
+        settle_up({"a": 100, "b": -99})
+
+
+def test_ties_break_on_user_id():
+    net = {"c": 100, "a": 100, "b": -100, "d": -100}
+
+    assert settle_up(net) == [("b", "a", 100), ("d", "c", 100)]
+
+
+def test_plan_does_not_depend_on_input_order():
+    rng = random.Random(7)
+    net = {f"user-{i}": cents for i, cents in enumerate([300, 300, -200, -200, -200])}
+    shuffled = list(net.items())
+    rng.shuffle(shuffled)
+
+    assert settle_up(dict(shuffled)) == settle_up(net)
+
+
+def test_net_cents_drops_settled_users():
+    balances = {
+        "a": {"owe": 10.0, "lent": 10.0},
+        "b": {"owe": 0.0, "lent": 5.25},
+        "c": {"owe": 5.25, "lent": 0.0},
+    }
+
+    assert to_net_cents(balances) == {"b": 525, "c": -525}
+
+
+def test_net_cents_residual_goes_to_largest_balance():
+    # Three-way split of 10.00 stored as 3.33 each leaves a cent unaccounted for
+    balances = {
+        "a": {"owe": 3.33, "lent": 10.0},
+        "b": {"owe": 3.33, "lent": 0.0},
+        "c": {"owe": 3.33, "lent": 0.0},
+    }
+
+    net = to_net_cents(balances)
+
+    assert sum(net.values()) == 0
+    assert net == {"a": 666, "b": -333, "c": -333}
+
+
+def test_net_cents_residual_tie_breaks_on_user_id():
+    balances = {
+        "c": {"owe": 1.01, "lent": 0.0},
+        "b": {"owe": 0.0, "lent": 1.01},
+        "d": {"owe": 1.0, "lent": 0.0},
+        "a": {"owe": 0.0, "lent": 1.01},
+    }
+
+    # a, b and c tie on the largest balance; the stray cent goes to the first id
+    assert to_net_cents(balances) == {"a": 100, "b": 101, "c": -101, "d": -100}
+
+
+def test_net_cents_rejects_large_residual():
+    balances = {
+        "a": {"owe": 0.0, "lent": 10.0},
+        "b": {"owe": 9.0, "lent": 0.0},
+    }
+
+    with pytest.raises(ValueError):
+        to_net_cents(balances)
@@ -0,0 +1,122 @@
+import sqlite3
+import threading
+import time
+
+from cache import TTLCache
+
+
+class TranslationCache:
+    def __init__(self, path="translation_cache.sqlite3", maxsize=4096,
+                 ttl=30 * 24 * 3600, max_rows=200000):
+        """
+        Translation memo: an in-memory LRU in front of a durable SQLite store.
+
+        Args:
+            path (str): SQLite database file
+            maxsize (int): Entries held in memory
+            ttl (float): Seconds a translation stays valid
+            max_rows (int): Rows kept on disk before the oldest are evicted
+        """
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "category TEXT NOT NULL, item_name TEXT NOT NULL, translation TEXT NOT NULL, "
+            "created_at REAL NOT NULL, PRIMARY KEY (category, item_name))"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS translations_created_at ON translations (created_at)"
+        )
+        self.conn.commit()
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @staticmethod
+    def make_key(category, item_name):
+        """
+        Normalizes (bill_category, item name) so case and spacing variants share an entry.
+        """
+        return (
+            " ".join(str(category).split()).lower(),
+            " ".join(str(item_name).split()).lower(),
+        )
+
+    def get(self, category, item_name):
+        """
+        Returns the cached translation, or None on a miss.
+        """
+        key = self.make_key(category, item_name)
+        translation = self.memory.get(key)
+        if translation is not None:
+            return translation
+
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT translation, created_at FROM translations WHERE category = ? AND item_name = ?",
+                key,
+            ).fetchone()
+            if row is not None and row[1] + self.ttl > time.time():
+                self.disk_hits += 1
+                self.memory.set(key, row[0])
+                return row[0]
+            if row is not None:
+                self.conn.execute(
+                    "DELETE FROM translations WHERE category = ? AND item_name = ?", key
+                )
+                self.conn.commit()
+            self.misses += 1
+            return None
+
+    def set(self, category, item_name, translation):
+        """
+        Stores a translation in memory and on disk.
+        """
+        key = self.make_key(category, item_name)
+        self.memory.set(key, translation)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO translations (category, item_name, translation, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (*key, translation, time.time()),
+            )
+            self.writes += 1
+            # Trim expired and overflow rows every so often rather than on every write
+            if self.writes % 1000 == 0:
+                self.evict()
+            self.conn.commit()
+
+    def evict(self):
+        """
+        Drops expired rows and the oldest rows beyond max_rows. Caller holds the lock.
+        """
+        self.conn.execute(
+            "DELETE FROM translations WHERE created_at <= ?", (time.time() - self.ttl,)
+        )
+        self.conn.execute(
+            "DELETE FROM translations WHERE rowid IN ("
+            "SELECT rowid FROM translations ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_rows,),
+        )
+
+    def stats(self):
+        """
+        Returns hit/miss counters across both tiers.
+        """
+        memory = self.memory.stats()
+        hits = memory["hits"] + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": memory["hits"],
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_size": memory["size"],
+        }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -1,16 +1,110 @@
 
+
 import openai
 import os
 from dotenv import load_dotenv
 import re
+import threading
 from openai import OpenAI
 from fuzzywuzzy import fuzz, process
 import jellyfish  # For phonetic matching
 from thefuzz import fuzz as thefuzz  # Additional fuzzy matching library
 import numpy as np
+from rapidfuzz import fuzz as rf_fuzz, process as rf_process
+from rapidfuzz.distance import JaroWinkler
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from audio_chunks import iter_audio_chunks
+from cache import TTLCache
+from metrics import metered_call
+
+
+class NameIndex:
+    def __init__(self, names):
+        """
+        Precomputed lowered names and phonetic codes for one group roster.
+
+        Args:
+            names (list): Valid names of the group members
+        """
+        self.names = list(names)
+        self.lowered = [name.lower() for name in self.names]
+        self.soundex_codes = np.array([jellyfish.soundex(name) for name in self.names])
+        self.metaphone_codes = np.array([jellyfish.metaphone(name) for name in self.names])
+
+    def score_matrix(self, words):
+        """
+        Scores every word against every name in one vectorized pass.
+
+        Args:
+            words (list): Transcript tokens
+
+        Returns:
+            numpy.ndarray: (len(words), len(names)) scores: the best of ratio, partial_ratio
+                and Jaro-Winkler (0-100), plus 10 when a phonetic code matches
+        """
+        lowered = [word.lower() for word in words]
+        # Same metrics as the per-pair loop; ratio and partial_ratio are rounded like thefuzz
+        scores = np.rint(rf_process.cdist(lowered, self.lowered, scorer=rf_fuzz.ratio, dtype=np.float64, workers=-1))
+        np.maximum(scores, np.rint(rf_process.cdist(lowered, self.lowered, scorer=rf_fuzz.partial_ratio, dtype=np.float64, workers=-1)), out=scores)
+        np.maximum(scores, rf_process.cdist(lowered, self.lowered, scorer=JaroWinkler.normalized_similarity, dtype=np.float64, workers=-1) * 100, out=scores)
+
+        # Boost score if phonetic matching
+        word_soundex = np.array([jellyfish.soundex(word) for word in words])
+        word_metaphone = np.array([jellyfish.metaphone(word) for word in words])
+        phonetic = (word_soundex[:, None] == self.soundex_codes[None, :]) | (word_metaphone[:, None] == self.metaphone_codes[None, :])
+        scores += 10 * phonetic
+        return scores
+
+    def match_words(self, words, threshold=65):
+        """
+        Best roster name for each word.
+
+        Returns:
+            list: (matched_name, confidence_score) or (None, 0) per word
+        """
+        if not words or not self.names:
+            return [(None, 0)] * len(words)
+        scores = self.score_matrix(words)
+        # argmax keeps the first of tied names, like the loop's strict comparison
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(words)), best]
+        return [
+            (self.names[i], float(score)) if score >= threshold else (None, 0)
+            for i, score in zip(best, best_scores)
+        ]
+
+
+# Common words in split instructions that the fuzzy scorers tend to mistake for short names
+FILLER_WORDS = frozenset("""
+a an and or but the to of for with between among by from in on at into is are was were be
+it its me my we us our you your he him his she her they them their i this that these those
+split splits splitting share shared pay paid paying owe owes bill bills total each everyone
+all both half rest also just please okay ok so then plus except only same between too
+""".split())
+
 
 class Voicee:
-    def __init__(self):
+    def __init__(self, client=None, min_confidence=90, tie_margin=5):
+        """
+        Args:
+            client: Shared OpenAI client; one is created from .env when omitted
+            min_confidence (float): Match score a token needs to be accepted without the LLM
+            tie_margin (float): Closest a runner-up name may score before the match counts as a tie
+        """
+        # Name indexes keyed by roster, built once and reused across requests
+        self.name_indexes = TTLCache(maxsize=256, ttl=3600)
+        self.min_confidence = min_confidence
+        self.tie_margin = tie_margin
+        # How often each tier decided, and why the LLM was needed
+        self.tier_counts = {"local": 0, "llm": 0}
+        self.escalation_reasons = {"low_confidence": 0, "near_tie": 0, "unmatched": 0}
+        self.stats_lock = threading.Lock()
+        # Reuse a shared client when one is provided
+        if client is not None:
+            self.client = client
+            return
         # Set up OpenAI client
         load_dotenv("/Users/swagatbhowmik/CS projects/CodeJam2024/bill_parser/.env")
         openai.api_key = os.getenv("OPENAI_API_KEY")
@@ -58,39 +152,70 @@ class Voicee:
                 phonetic_match or 
                 metaphone_match)
 
-    def find_best_match(self, word, valid_names):
+    def name_index(self, valid_names):
+        """
+        Returns the NameIndex for this roster, building it on first use.
+        """
+        key = tuple(valid_names)
+        index = self.name_indexes.get(key)
+        if index is None:
+            index = NameIndex(valid_names)
+            self.name_indexes.set(key, index)
+        return index
+
+    def resolve_locally(self, sentence, names_list):
         """
-        Finds the best matching name from the valid names list.
+        Matches names with the local scorers alone and reports why the result may be ambiguous.
         
         Args:
-            word (str): Word to match
-            valid_names (list): List of valid names to match against
+            sentence (str): The sentence containing the names.
+            names_list (list): The list of names to check for.
             
         Returns:
-            tuple: (matched_name, confidence_score) or (None, 0) if no match found
+            tuple: (confidently matched names, set of reasons to ask the LLM)
         """
-        best_match = None
-        best_score = 0
-        
-        for valid_name in valid_names:
-            # Calculate multiple similarity scores
-            levenshtein_score = thefuzz.ratio(word.lower(), valid_name.lower())
-            partial_score = thefuzz.partial_ratio(word.lower(), valid_name.lower())
-            jaro_winkler = jellyfish.jaro_winkler_similarity(word.lower(), valid_name.lower()) * 100
-            
-            # Take the maximum of different similarity metrics
-            max_score = max(levenshtein_score, partial_score, jaro_winkler)
-            
-            # Boost score if phonetic matching
-            if (jellyfish.soundex(word) == jellyfish.soundex(valid_name) or 
-                jellyfish.metaphone(word) == jellyfish.metaphone(valid_name)):
-                max_score += 10
-                
-            if max_score > best_score:
-                best_score = max_score
-                best_match = valid_name
-                
-        return (best_match, best_score) if best_score >= 65 else (None, 0)
+        index = self.name_index(names_list)
+        tokens = [(match.group(), match.start()) for match in re.finditer(r'\b\w+\b', sentence)]
+        if not tokens or not index.names:
+            return [], set()
+
+        scores = index.score_matrix([word for word, _ in tokens])
+        order = np.argsort(-scores, axis=1, kind="stable")
+        rows = np.arange(len(tokens))
+        best = order[:, 0]
+        best_scores = scores[rows, best]
+        runner_up = scores[rows, order[:, 1]] if len(index.names) > 1 else np.zeros(len(tokens))
+
+        found_names = set()
+        reasons = set()
+        for k, (word, start) in enumerate(tokens):
+            lowered = word.lower()
+            if word.isdigit() or (lowered in FILLER_WORDS and lowered not in index.lowered):
+                continue
+            if best_scores[k] >= self.min_confidence:
+                if best_scores[k] - runner_up[k] < self.tie_margin:
+                    reasons.add("near_tie")
+                else:
+                    found_names.add(index.names[best[k]])
+            elif best_scores[k] >= 65:
+                reasons.add("low_confidence")
+            elif word[0].isupper() and sentence[:start].rstrip()[-1:] not in ("", ".", "!", "?"):
+                # Capitalized mid-sentence, so likely a name the roster scorers could not place
+                reasons.add("unmatched")
+        return sorted(found_names), reasons
+
+    def record_tier(self, tier, reasons=()):
+        with self.stats_lock:
+            self.tier_counts[tier] += 1
+            for reason in reasons:
+                self.escalation_reasons[reason] += 1
+
+    def stats(self):
+        with self.stats_lock:
+            return {
+                "tiers": dict(self.tier_counts),
+                "escalation_reasons": dict(self.escalation_reasons),
+            }
 
     def extract_names(self, sentence, names_list):
         """
@@ -104,8 +229,14 @@ class Voicee:
             list: A list of names found in the sentence.
         """
         try:
-            # First try using GPT-4 for initial name extraction
-            completion = self.client.chat.completions.create(
+            # Local matcher first; the GPT-4 round trip is only for ambiguous sentences
+            local_names, reasons = self.resolve_locally(sentence, names_list)
+            if not reasons:
+                self.record_tier("local")
+                return local_names
+            self.record_tier("llm", reasons)
+
+            completion = metered_call("extract_names", self.client.chat.completions.create,
                 model="gpt-4",
                 messages=[
                     {
@@ -141,20 +272,15 @@ class Voicee:
             # Additional processing for more lenient matching
             found_names = set()  # Use set to avoid duplicates
             
-            # Process words from the original sentence
+            # Process words from the original sentence, scoring them all against the roster at once
             words = re.findall(r'\b\w+\b', sentence)
-            for word in words:
-                # Check each word against valid names with lenient matching
-                best_match, score = self.find_best_match(word, names_list)
+            for best_match, score in self.name_index(names_list).match_words(words):
                 if best_match:
                     found_names.add(best_match)
             
-            # Combine results from GPT and fuzzy matching
-            combined_names = set(initial_names) | found_names
-            
-            # Final verification pass
-            verified_names = []
-            for found_name in combined_names:
+            # Fuzzy matches are roster names already; only GPT's names need verifying
+            verified_names = list(found_names)
+            for found_name in set(initial_names) - found_names:
                 # Find the closest match in the original names list
                 best_match = process.extractOne(found_name, names_list)
                 if best_match and best_match[1] >= 65:  # 65% similarity threshold
@@ -166,25 +292,65 @@ class Voicee:
             print(f"Error in extract_names: {str(e)}")
             return []
 
-    def transcribe(self, audio_file, names):
+    def transcribe_audio(self, audio_file):
+        """
+        Transcribes one recording, or one piece of it, to text.
+        """
+        return metered_call("transcribe", self.client.audio.transcriptions.create,
+            model="whisper-1",
+            file=audio_file,
+            language="en",
+            response_format="text",
+            prompt="The following audio is in English with possible accent variations and name pronunciations."
+        )
+
+    def transcribe(self, audio_file, names, filename=None, content_type=None,
+                   chunk_bytes=8 * 1024 * 1024, max_concurrency=4):
         """
         Transcribes audio and extracts matching names.
         
         Args:
-            audio_file: The audio file to transcribe
+            audio_file: The audio file to transcribe, as a binary file object
             names (list): List of valid names to check for
+            filename (str): Original file name, defaults to the file object's name
+            content_type (str): MIME type of the recording
+            chunk_bytes (int): Recordings larger than this are cut and transcribed concurrently
+            max_concurrency (int): Pieces transcribed at the same time, which bounds memory
+                to about (max_concurrency + 1) * chunk_bytes
             
         Returns:
             list: List of found names
         """
         try:
-            transcription = self.client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                language="en",
-                response_format="text",
-                prompt="The following audio is in English with possible accent variations and name pronunciations."
-            )
+            filename = filename or os.path.basename(getattr(audio_file, "name", "") or "audio.mp3")
+            # Hold at most max_concurrency pieces plus the one being cut: the oldest is collected
+            # before the next is cut, and collecting in submit order keeps them in sequence
+            texts = []
+            pending = deque()
+
+            def collect_oldest():
+                future, piece_file = pending.popleft()
+                try:
+                    texts.append(future.result())
+                finally:
+                    # Frees the piece's buffer even if the HTTP client still references it
+                    if piece_file is not audio_file:
+                        piece_file.close()
+
+            try:
+                with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+                    for piece in iter_audio_chunks(audio_file, filename, content_type, chunk_bytes):
+                        pending.append((executor.submit(self.transcribe_audio, piece), piece[1]))
+                        if len(pending) >= max_concurrency:
+                            collect_oldest()
+                    while pending:
+                        collect_oldest()
+            finally:
+                # Pieces left behind by a failed transcription
+                for _, piece_file in pending:
+                    if piece_file is not audio_file:
+                        piece_file.close()
+            transcription = " ".join(text.strip() for text in texts)
             print("Transcribed text:", transcription)
             
             # Extract names from the transcribed text